@@ -1,196 +1,465 @@
 import random
-import math
-import copy
 from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, wait
 import time
 from game_state import *
 
-class ISMCTSNode:
-    def __init__(self, game_state, parent=None, action=None, player=None):
-        self.game_state = game_state  # Determinized game state
-        self.parent = parent
-        self.action = action  # The action that led to this node
-        self.player = player  # Player who made the action
-        self.children = []
-        self.visits = 0
-        self.wins = 0.0
-        self.untried_actions = []  # Initialize as empty list instead of None
-        self.is_terminal = False
-        
-    def is_fully_expanded(self):
-        return len(self.untried_actions) == 0
+from bid_table import load_bid_table
+from endgame import cards_left, solved_scores
+from parallel import get_pool
+from rollout import rollout_rewards, rollout_win_rate
+from search_tree import SearchTree, ROOT, BID_CODE, action_code, code_action, permute_code
+from zobrist import advance_key, info_set_key
+import numpy as np
+
+def player_rewards(result, player_names):
+    """Each player's score relative to the average, normalized to [-1, 1], in player_names order"""
+    scores = np.array([result.get(name, 0) for name in player_names], dtype=float)
+    centred = scores - scores.mean()
+    max_diff = np.abs(centred).max()
+    return centred / max_diff if max_diff > 0 else np.zeros(len(scores))
+
+def worker_player(player_name, settings):
+    """An ISMCTSAIPlayer in a pool worker, configured like the player that sent the job"""
+    ai_player = ISMCTSAIPlayer(player_name)
+    ai_player.__dict__.update(settings)
+    return ai_player
+
+def root_stats(tree, perm):
+    """Action codes and visits of the root's children, for a tree searched in suit relabelling ``perm``
+
+    The codes are mapped back to the real suits.
+    """
+    codes, visits, _ = tree.child_stats(ROOT)
+    inverse = invert_permutation(perm)
+    return [permute_code(code, inverse) for code in codes.tolist()], visits.tolist()
+
+def root_search(game_state, player_name, settings, iterations, time_limit, seed):
+    """Process pool entry point: one independent search, returning root_stats()"""
+    random.seed(seed)
+    ai_player = worker_player(player_name, settings)
+    state, perm = game_state.canonical(player_name)
+    tree = ai_player.grow_tree(SearchTree(), state, iterations, time_limit)
+    return root_stats(tree, perm)
+
+def evaluate_chunk(game_state, player_name, settings, actions, hands, seeds, deadline):
+    """Process pool entry point: score ``actions`` on a chunk of the world pool"""
+    ai_player = worker_player(player_name, settings)
+    return ai_player.evaluate_worlds(game_state, actions, hands, seeds, deadline)
+
+class ISMCTSAIPlayer:
+    def __init__(self, player_name, iterations=1000, workers=1):
+        self.player_name = player_name
+        self.iterations = iterations
+        self.workers = workers  # Processes used by the search
+        # "root": each worker grows its own tree and the root statistics are merged.
+        # "tree": one shared tree with virtual loss; workers only run the rollouts.
+        self.parallel = "root"
+        self.leaf_rollouts = 16  # Batched rollouts per leaf in tree-parallel search
+        self.chunk_worlds = 8  # Determinizations per pool job in the "determinized" search
+        self.progress_batch = 100  # Iterations between progress reports of the anytime search
+        self.time_limit = 2.0  # 2 seconds per move
+        self.card_play_iterations = 500  # Iterations for card play decisions
+        self.batch_rollouts = 256  # Batched rollouts per evaluation
+        # "so-ismcts": one information-set tree shared by all determinizations.
+        # "determinized": evaluate every action separately on each determinization.
+        self.search = "so-ismcts"
+        # Keep the tree between decisions of a round and continue from the moves made since
+        self.reuse_tree = True
+        self.tree = None
+        self.tree_round = None
+        self.tree_history = []  # move_history when the kept tree was searched
+        self.tree_perm = None  # Suit relabelling the kept tree was searched in (see WizardGame.canonical)
+        self.ponder_limit = 20000  # Root visits at which pondering stops growing the tree
+        self.transpositions = True  # Share statistics between move orders reaching the same information set
+        self.rave_k = 250  # Child visits at which its AMAF (RAVE) estimate still weighs half; 0 turns RAVE off
+        self.rave_window = 2  # AMAF counts a card if its player plays it within this many of their next plays
+        self.bid_table = load_bid_table()  # Precomputed bid table (see bid_table.py), None if not generated
+        self.bid_refine = 0.0  # Seconds of search among the table's best bids; 0 takes the table's bid
+        self.endgame_cards = 8  # Solve the round exactly instead of rolling out once this few cards are left
     
-    def best_child(self, c_param=1.4):
-        if not self.children:
-            return None
-        choices_weights = [
-            (child.wins / child.visits) + c_param * math.sqrt((2 * math.log(self.visits) / child.visits))
-            for child in self.children
-        ]
-        return self.children[choices_weights.index(max(choices_weights))]
+    def sample_hands(self, game_state, player_perspective):
+        """Sample hands for the other players that are consistent with what player_perspective knows
+        
+        Deals the unseen cards from the game's CardTracker: hand sizes are
+        kept, and a player known to be void in a suit gets none of it. The
+        most constrained players are dealt first; if the voids can't all be
+        met after a few tries, they are dropped for this sample.
+        """
+        tracker = game_state.tracker
+        unseen = tracker.unseen(game_state.players[player_perspective]["hand"])
+        others = [(index, name) for index, name in enumerate(game_state.player_names)
+                  if name != player_perspective]
+        
+        for attempt in range(10):
+            remaining = unseen
+            hands = {}
+            order = sorted(others, key=lambda item: (unseen & ~tracker.void_mask(item[0])).bit_count())
+            for index, name in order:
+                eligible = hand_cards(remaining & ~tracker.void_mask(index))
+                if len(eligible) < tracker.hand_sizes[index]:
+                    break
+                hands[name] = hand_mask(random.sample(eligible, tracker.hand_sizes[index]))
+                remaining &= ~hands[name]
+            else:
+                return hands
+        
+        # Voids that can't be met together: deal ignoring them
+        remaining_cards = hand_cards(unseen)
+        random.shuffle(remaining_cards)
+        hands = {}
+        card_index = 0
+        for index, name in others:
+            cards_needed = tracker.hand_sizes[index]
+            hands[name] = hand_mask(remaining_cards[card_index:card_index + cards_needed])
+            card_index += cards_needed
+        return hands
     
-    def expand(self):
-        if not self.untried_actions:
-            return None
-        action = self.untried_actions.pop()
-        new_state = self.apply_action(action)
-        child_node = ISMCTSNode(new_state, parent=self, action=action, player=self.game_state.get_current_player())
-        child_node.initialize_actions()
-        self.children.append(child_node)
-        return child_node
+    def information_set_actions(self, game_state):
+        """Action codes that could be legal here in any determinization from this player's view"""
+        if game_state.phase == GamePhase.BIDDING:
+            return [BID_CODE + bid for bid in range(game_state.round_num + 1)]
+        own_hand = game_state.players[self.player_name]["hand"]
+        if game_state.get_current_player() == self.player_name:
+            return game_state.get_distinct_cards(self.player_name)
+        # An opponent may hold any card we can't see
+        return hand_cards(game_state.tracker.unseen(own_hand))
     
-    def initialize_actions(self):
-        """Initialize untried actions for this node"""
-        if not self.untried_actions:
-            self.untried_actions = self.game_state.get_legal_actions()
-            self.is_terminal = len(self.untried_actions) == 0 or self.game_state.is_terminal()
+    def descend(self, tree, game_state):
+        """Selection and expansion on one determinization; returns the path of node indices
+        
+        Walks game_state down with apply() until it steps onto a new node or the
+        round ends. At each node only the actions legal in this world compete.
+        With transpositions on, the information-set key is carried along and a
+        node reaching an already expanded information set shares its children.
+        """
+        node = ROOT
+        path = [ROOT]
+        if self.transpositions:
+            perspective = game_state.player_names.index(self.player_name)
+            if not tree.key[ROOT]:
+                tree.key[ROOT] = info_set_key(game_state, self.player_name)
+            key = int(tree.key[ROOT])
+        while game_state.phase in (GamePhase.BIDDING, GamePhase.PLAYING):
+            if not tree.is_expanded(node):
+                if not (self.transpositions and tree.transpose(node, key)):
+                    tree.expand(node, self.information_set_actions(game_state), game_state.current_player_index)
+                    if self.transpositions:
+                        tree.remember(node, key)
+            player = game_state.get_current_player()
+            if game_state.phase == GamePhase.BIDDING:
+                legal = tree.legal_children(node)
+            else:
+                legal = tree.legal_children(node, game_state.distinct_card_mask(player))
+            node = tree.select(node, legal, rave_k=self.rave_k)
+            game_state.apply(code_action(int(tree.action[node]), player))
+            path.append(node)
+            if self.transpositions:
+                key = advance_key(key, game_state, perspective)
+                tree.key[node] = key
+            if tree.visits[node] == 0:
+                break  # Stepped onto a new node
+        return path
     
-    def apply_action(self, action):
-        # Create a copy of the game state and apply the action
-        new_state = copy.deepcopy(self.game_state)
-        try:
-            if action['type'] == 'bid':
-                new_state.process_bid(action['value'])
-            elif action['type'] == 'play_card':
-                new_state.play_card(action['card'], action['player'])
-        except Exception as e:
-            # If action fails, return current state
-            pass
-        return new_state
+    def worker_settings(self):
+        """This player's search settings, for the copies that run its jobs in the process pool
+        
+        The kept tree and the bid table stay here: the workers search from
+        scratch and never bid from the table.
+        """
+        settings = self.__dict__.copy()
+        for name in ('tree', 'tree_round', 'tree_history', 'tree_perm', 'bid_table'):
+            del settings[name]
+        settings['workers'] = 1
+        return settings
     
-    def simulate(self):
-        # Run a random playout from this state
-        current_state = copy.deepcopy(self.game_state)
-        max_moves = 100  # Prevent infinite loops
-        moves_made = 0
+    def iteration_moves(self, game_state, first_move):
+        """(player index, action code) of every move in game_state's history from ``first_move`` on, for AMAF"""
+        index = {name: i for i, name in enumerate(game_state.player_names)}
+        return [(index[action['player']], action_code(action)) for action in game_state.move_history[first_move:]]
+    
+    def carried_tree(self, game_state):
+        """The tree to search game_state with, the position relabelled for it and the relabelling
         
-        while not current_state.is_terminal() and moves_made < max_moves:
-            actions = current_state.get_legal_actions()
-            if not actions:
+        The search runs on the canonical relabelling of the suits from this
+        player's view, so its keys and action codes are the same for every
+        position that differs only by the names of the non-trump suits; its
+        actions map back with permute_code(code, invert_permutation(perm)).
+        The kept tree is advanced along the moves made since the last search
+        and keeps the relabelling it was searched in. The subtree under the
+        observed moves becomes the new root, so the search starts with the
+        visits it already gathered for this position.
+        """
+        history = self.tree_history
+        moves = game_state.move_history
+        if (self.reuse_tree and self.tree is not None and game_state.round_num == self.tree_round
+                and moves[:len(history)] == history):
+            perm = self.tree_perm
+            node = ROOT
+            for action in moves[len(history):]:
+                node = self.tree.find_child(node, permute_code(action_code(action), perm))
+                if node is None:
+                    break
+            else:
+                tree = self.tree if node == ROOT else self.tree.subtree(node)
+                return tree, game_state.relabelled(perm), perm
+        
+        state, perm = game_state.canonical(self.player_name)
+        return SearchTree(), state, perm
+    
+    def keep_tree(self, tree, game_state, perm):
+        """Keep ``tree``, searched from game_state in relabelling ``perm``, for the next decision of the round"""
+        self.tree = tree
+        self.tree_round = game_state.round_num
+        self.tree_history = game_state.move_history[:]
+        self.tree_perm = perm
+    
+    def grow_tree(self, tree, game_state, iterations, time_limit=None):
+        """Run single-observer ISMCTS iterations on ``tree`` from game_state
+        
+        One information-set tree from this player's point of view is shared by
+        every iteration. Each iteration samples a fresh determinization of the
+        hidden hands, descends with availability-based UCB, plays a random
+        rollout and backs up each player's own reward, along the path and into
+        the AMAF statistics of every card played later. The search runs in
+        place on a scratch clone with apply()/undo().
+        """
+        start_time = time.time()
+        state = game_state.clone()
+        first_move = len(state.move_history)
+        
+        # Run ISMCTS iterations
+        for i in range(iterations):
+            if time_limit and time.time() - start_time > time_limit:
                 break
             
-            action = random.choice(actions)
+            # Determinization - deal the hidden cards for this iteration
+            for player_name, hand in self.sample_hands(game_state, self.player_name).items():
+                state.players[player_name]["hand"] = hand
+            
             try:
-                if action['type'] == 'bid':
-                    current_state.process_bid(action['value'])
-                elif action['type'] == 'play_card':
-                    current_state.play_card(action['card'], action['player'])
-            except Exception as e:
-                # If action fails, break simulation
+                path = self.descend(tree, state)
+                
+                # Simulation phase - run random playout
+                result = self.playout(state)
+                moves = self.iteration_moves(state, first_move)
+            finally:
+                while state.undo_stack:
+                    state.undo()
+            
+            # Backpropagation phase - one pass over the selection path
+            rewards = player_rewards(result, state.player_names)
+            tree.backpropagate(path, rewards)
+            if self.rave_k:
+                tree.update_amaf(path, moves, rewards, self.rave_window)
+        return tree
+    
+    def grow_tree_parallel(self, tree, game_state, iterations, time_limit=None):
+        """Tree-parallel ISMCTS: select here, run the rollouts in the process pool
+        
+        Up to two leaves per worker are in flight at once. Each carries a
+        virtual loss along its path until its batched rollouts come back, so
+        concurrent descents spread over different lines of play. Failed
+        rollouts add no visits and are reported once per call.
+        """
+        start_time = time.time()
+        state = game_state.clone()
+        first_move = len(state.move_history)
+        pool = get_pool(self.workers)
+        pending = {}  # Future -> (selection path, moves along it)
+        launched = 0
+        failed = 0
+        error = None
+        
+        while True:
+            while (launched < iterations and len(pending) < 2 * self.workers
+                   and not (time_limit and time.time() - start_time > time_limit)):
+                for player_name, hand in self.sample_hands(game_state, self.player_name).items():
+                    state.players[player_name]["hand"] = hand
+                try:
+                    path = self.descend(tree, state)
+                    moves = self.iteration_moves(state, first_move)
+                    leaf = state.clone()
+                finally:
+                    while state.undo_stack:
+                        state.undo()
+                launched += 1
+                
+                if leaf.phase not in (GamePhase.BIDDING, GamePhase.PLAYING) or self.in_endgame(leaf):
+                    # Nothing left to roll out, or cheaper to solve here than to send out
+                    rewards = player_rewards(solved_scores(leaf), leaf.player_names)
+                    tree.backpropagate(path, rewards)
+                    if self.rave_k:
+                        tree.update_amaf(path, moves, rewards, self.rave_window)
+                    continue
+                tree.add_virtual_loss(path)
+                pending[pool.submit(rollout_rewards, leaf, self.leaf_rollouts)] = path, moves
+            
+            if not pending:
                 break
-            
-            moves_made += 1
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, moves = pending.pop(future)
+                tree.remove_virtual_loss(path)
+                try:
+                    reward = future.result()
+                except Exception as e:
+                    failed += 1
+                    error = e
+                    continue
+                tree.backpropagate(path, reward)
+                if self.rave_k:
+                    tree.update_amaf(path, moves, reward, self.rave_window)  # The pool's rollouts only return rewards
+        if failed:
+            print(f'{failed} of {launched} rollouts failed: {error!r}')
+        return tree
+    
+    def search_progress(self, game_state, iterations, time_limit=None, early_stop=True):
+        """Anytime search: grow the kept tree in batches, yielding progress after each
+        
+        Each progress dict holds the current best 'action', the root 'visits'
+        per action code, the 'iterations' run so far and the leader's share of
+        the visits as 'confidence'. The search ends at the iteration or time
+        budget, or once the leader is 'decided': it is further ahead of the
+        runner-up than the remaining budget could make up.
+        """
+        start_time = time.time()
+        tree, state, perm = self.carried_tree(game_state)
+        start_visits = int(tree.visits[ROOT])
+        parallel_tree = self.workers > 1 and self.parallel == "tree"
+        grow = self.grow_tree_parallel if parallel_tree else self.grow_tree
+        searched = 0
+        self.keep_tree(tree, game_state, perm)
         
-        return current_state.get_final_scores()
+        while searched < iterations:
+            elapsed = time.time() - start_time
+            if time_limit and elapsed > time_limit:
+                break
+            before = searched
+            grow(tree, state, min(self.progress_batch, iterations - searched),
+                 time_limit - elapsed if time_limit else None)
+            searched = int(tree.visits[ROOT]) - start_visits
+            if searched == before:
+                break  # The batch added nothing, e.g. every rollout failed
+            
+            # Iterations still to come, by budget and by the current rate
+            remaining = iterations - searched
+            elapsed = time.time() - start_time
+            if time_limit and elapsed > 0:
+                remaining = min(remaining, searched / elapsed * max(0.0, time_limit - elapsed))
+            
+            codes, visits = root_stats(tree, perm)
+            if not codes:
+                return
+            visits = np.array(visits)
+            ranked = np.sort(visits)[::-1]
+            runner_up = int(ranked[1]) if len(ranked) > 1 else 0
+            progress = {
+                'action': code_action(codes[visits.argmax()], game_state.get_current_player()),
+                'visits': dict(zip(codes, visits.tolist())),
+                'iterations': searched,
+                'confidence': float(ranked[0] / max(1, visits.sum())),
+                'decided': int(ranked[0]) - runner_up > remaining,
+            }
+            yield progress
+            if early_stop and progress['decided']:
+                return
     
-    def backpropagate(self, result, ai_player):
-        self.visits += 1
-        # Calculate reward for AI player
-        if ai_player in result and result:
-            # Use normalized score relative to other players
-            scores = list(result.values())
-            if scores:
-                ai_score = result[ai_player]
-                avg_score = sum(scores) / len(scores)
-                # Normalize reward to [-1, 1] range
-                max_diff = max(abs(s - avg_score) for s in scores) if len(scores) > 1 else 1
-                if max_diff > 0:
-                    self.wins += (ai_score - avg_score) / max_diff
-        
-        if self.parent:
-            self.parent.backpropagate(result, ai_player)
-
-class ISMCTSAIPlayer:
-    def __init__(self, player_name, iterations=1000):
-        self.player_name = player_name
-        self.iterations = iterations
-        self.time_limit = 2.0  # 2 seconds per move
-        self.card_play_iterations = 500  # Iterations for card play decisions
+    def run_ismcts(self, game_state, iterations, time_limit=None, callback=None):
+        """Run ISMCTS and return the best action for the player to move
+        
+        With workers > 1 and parallel == "root", the other workers - 1
+        searches run from the same root in the process pool, each with its own
+        determinizations, and the root visit counts of all of them are summed
+        before choosing. With parallel == "tree" all workers serve one shared
+        tree (see grow_tree_parallel). The local tree is kept for the next
+        decision of the round (see carried_tree).
+        
+        ``callback`` gets every progress dict of search_progress. The search
+        stops early once the leading action can no longer be overtaken.
+        """
+        if not game_state.get_legal_actions():
+            return None
+        
+        futures = []
+        if self.workers > 1 and self.parallel != "tree":
+            pool = get_pool(self.workers)  # Shared with the other parallel searches; one slot stays free
+            settings = self.worker_settings()
+            futures = [pool.submit(root_search, game_state, self.player_name, settings, iterations, time_limit,
+                                   random.getrandbits(64))
+                       for _ in range(self.workers - 1)]
+        
+        # The pool searches can't be stopped early, so there is nothing to gain from it then
+        for progress in self.search_progress(game_state, iterations, time_limit, early_stop=not futures):
+            if callback:
+                callback(progress)
+        
+        # Merge root child visits across the searches
+        totals = defaultdict(int, zip(*root_stats(self.tree, self.tree_perm)))
+        for future in futures:
+            try:
+                codes, visits = future.result()
+            except Exception as e:
+                print(f'Root search worker failed: {e!r}')
+                continue
+            for code, count in zip(codes, visits):
+                totals[code] += count
+        
+        # Return the most visited action
+        if not totals:
+            return None
+        best_code = max(totals, key=totals.get)
+        return code_action(best_code, game_state.get_current_player())
     
-    def determinize_game_state(self, game_state, player_perspective):
-        """Create a determinized version of the game state from player's perspective"""
-        try:
-            # This is a key part of ISMCTS - we sample unknown information
-            det_state = copy.deepcopy(game_state)
-            
-            # Get cards the player can see (their own hand + played cards)
-            visible_cards = set()
-            visible_cards.update(game_state.players[player_perspective]["hand"])
-            visible_cards.update(game_state.played_cards.values())
-            if game_state.trump_card and game_state.trump_card not in ["Wizard", "Fool"]:
-                visible_cards.add(game_state.trump_card)
-            
-            # Calculate remaining cards
-            all_cards = set(create_deck())
-            remaining_cards = list(all_cards - visible_cards)
-            random.shuffle(remaining_cards)
-            
-            # Count how many cards each other player should have
-            cards_per_player = game_state.round_num
-            
-            # Distribute remaining cards to other players
-            card_index = 0
-            for player_name, player_info in det_state.players.items():
-                if player_name != player_perspective:
-                    # Only replace cards if we have enough remaining cards
-                    cards_needed = cards_per_player - len(game_state.played_cards.get(player_name, []))
-                    if card_index + cards_needed <= len(remaining_cards):
-                        player_info["hand"] = remaining_cards[card_index:card_index + cards_needed]
-                        card_index += cards_needed
-                    # If not enough cards, keep original hand (shouldn't happen in normal game)
-            
-            return det_state
-        except Exception as e:
-            # If determinization fails, return original state
-            return copy.deepcopy(game_state)
+    def ponder(self, game_state, iterations):
+        """Search ahead on someone else's turn, growing the kept tree for our next decision
+        
+        The tree is rooted at the other player's move, so whatever they play
+        the matching subtree is picked up by carried_tree. Returns False when
+        there is nothing to do: pondering needs the shared so-ismcts tree and
+        stops at ponder_limit root visits.
+        """
+        if self.search != "so-ismcts" or not self.reuse_tree or not game_state.get_legal_actions():
+            return False
+        tree, state, perm = self.carried_tree(game_state)
+        if tree.visits[ROOT] >= self.ponder_limit:
+            return False
+        self.keep_tree(self.grow_tree(tree, state, iterations), game_state, perm)
+        return True
     
-    def run_ismcts(self, game_state, iterations, time_limit=None):
-        """Run ISMCTS algorithm and return the best action"""
-        start_time = time.time()
+    def in_endgame(self, game_state):
+        """Whether few enough cards are left to play the rest of the round out exactly"""
+        return game_state.phase == GamePhase.PLAYING and cards_left(game_state) <= self.endgame_cards
+    
+    def playout(self, game_state):
+        """Play random legal moves to the end of the round with apply() and return the scores
         
-        # Create root node
-        root = ISMCTSNode(game_state)
-        root.initialize_actions()
+        In the endgame the rest of the round is solved exactly instead.
+        """
+        if self.in_endgame(game_state):
+            return solved_scores(game_state)
         
-        if not root.untried_actions:
-            return None
+        max_moves = 100  # Prevent infinite loops
+        moves_made = 0
         
-        # Run ISMCTS iterations
-        for i in range(iterations):
-            if time_limit and time.time() - start_time > time_limit:
+        while not game_state.is_terminal() and moves_made < max_moves:
+            actions = game_state.get_legal_actions()
+            if not actions:
                 break
-                
-            # Selection and Expansion
-            node = root
-            path = [node]
-            
-            # Selection phase - traverse down the tree
-            while node.is_fully_expanded() and node.children and not node.is_terminal:
-                node = node.best_child()
-                path.append(node)
             
-            # Expansion phase - add a new child node
-            if not node.is_terminal and node.untried_actions:
-                node = node.expand()
-                if node:
-                    path.append(node)
-            
-            # Simulation phase - run random playout
-            result = node.simulate()
+            if not game_state.apply(random.choice(actions)):
+                # If action fails, break simulation
+                break
             
-            # Backpropagation phase
-            for node in path:
-                node.backpropagate(result, self.player_name)
-        
-        # Return best action
-        if root.children:
-            best_child = root.best_child(c_param=0)  # Exploitation only for final selection
-            return best_child.action if best_child else None
+            moves_made += 1
         
-        return None
+        return game_state.get_final_scores()
     
-    def get_bid(self, game_state):
-        """Use ISMCTS to determine the best bid"""
+    def get_bid(self, game_state, callback=None):
+        """Use ISMCTS to determine the best bid
+        
+        ``callback`` receives the search's progress reports (see search_progress).
+        """
         start_time = time.time()
         
         # Simple fallback if ISMCTS fails
@@ -198,35 +467,25 @@ class ISMCTSAIPlayer:
             # Get legal bids
             legal_bids = list(range(game_state.round_num + 1))
             
+            # A table lookup when the hand is in the precomputed bid table
+            if self.bid_table is not None:
+                bid = self.table_bid(game_state)
+                if bid is not None:
+                    return bid
+            
             # For very simple cases, use heuristics
             if len(legal_bids) <= 2 or self.iterations < 100:
                 return self.simple_bid_heuristic(game_state)
             
-            # Run ISMCTS with multiple determinizations
-            bid_scores = defaultdict(float)
-            bid_counts = defaultdict(int)
-            
-            '''determinizations = min(5, max(1, self.iterations // 200))
-            iterations_per_det = max(10, self.iterations // determinizations)
-            '''
-            determinizations = 1000
-            iterations_per_det = 100
-
+            if self.search == "so-ismcts":
+                action = self.run_ismcts(game_state, self.iterations, self.time_limit * 0.8, callback)
+                if action is not None:
+                    return action['value']
+                return self.simple_bid_heuristic(game_state)
             
-            for det_num in range(determinizations):
-                if time.time() - start_time > self.time_limit * 0.8:
-                    break
-                    
-                det_state = self.determinize_game_state(game_state, self.player_name)
-                
-                # Run ISMCTS for each possible bid
-                for bid in legal_bids:
-                    if time.time() - start_time > self.time_limit * 0.8:
-                        break
-                    
-                    score = self.evaluate_bid(det_state, bid, iterations_per_det // len(legal_bids))
-                    bid_scores[bid] += score
-                    bid_counts[bid] += 1
+            # Evaluate every bid on many determinizations, spread over the workers
+            bid_scores, bid_counts = self.evaluate_determinizations(game_state, legal_bids,
+                                                                    start_time + self.time_limit * 0.8)
             
             # Choose best bid
             if bid_scores:
@@ -243,17 +502,138 @@ class ISMCTSAIPlayer:
             print('Fallack Bid Exception')
             return self.simple_bid_heuristic(game_state)
     
+    def table_bid(self, game_state):
+        """Bid with the best expected score in the bid table, or None if the table doesn't know this hand
+        
+        With bid_refine > 0 the three best bids by the table are compared
+        again with a short determinized search.
+        """
+        names = game_state.player_names
+        seat = (names.index(self.player_name) - game_state.dealer_index - 1) % len(names)
+        expected = self.bid_table.expected_scores(game_state.players[self.player_name]["hand"],
+                                                  game_state.trump_suit, game_state.round_num, len(names), seat)
+        if expected is None:
+            return None
+        candidates = [int(bid) for bid in np.argsort(expected)[::-1][:3]]
+        if self.bid_refine <= 0 or len(candidates) == 1:
+            return candidates[0]
+        
+        bid_scores, bid_counts = self.evaluate_determinizations(game_state, candidates, time.time() + self.bid_refine)
+        if not bid_scores:
+            return candidates[0]
+        return max(bid_scores, key=lambda bid: bid_scores[bid] / bid_counts[bid])
+    
+    def sample_world_pool(self, game_state, count, rng):
+        """Pre-sample ``count`` determinizations as a (count, P) array of hand masks, plus a rollout seed each
+        
+        Without known voids the unseen cards are shuffled for all worlds at
+        once; otherwise each world is dealt with sample_hands.
+        """
+        names = game_state.player_names
+        tracker = game_state.tracker
+        me = names.index(self.player_name)
+        own_hand = game_state.players[self.player_name]["hand"]
+        others = [index for index in range(len(names)) if index != me]
+        hands = np.zeros((count, len(names)), dtype=np.uint64)
+        hands[:, me] = own_hand
+        
+        if not any(tracker.voids[index] for index in others):
+            unseen = np.array(hand_cards(tracker.unseen(own_hand)), dtype=np.uint64)
+            shuffled = unseen[rng.random((count, len(unseen))).argsort(axis=1)]
+            start = 0
+            for index in others:
+                dealt = shuffled[:, start:start + tracker.hand_sizes[index]]
+                hands[:, index] = np.bitwise_or.reduce(np.uint64(1) << dealt, axis=1)
+                start += tracker.hand_sizes[index]
+        else:
+            for world in range(count):
+                for name, hand in self.sample_hands(game_state, self.player_name).items():
+                    hands[world, names.index(name)] = hand
+        return hands, rng.integers(0, 2 ** 63, size=count)
+    
+    def evaluate_worlds(self, game_state, actions, hands, seeds, deadline):
+        """Sum each action's score over the given worlds, stopping at ``deadline``
+        
+        Every action is scored on the same world with the same rollout seed
+        (common random numbers), so the comparison between actions isn't
+        drowned in rollout noise. Each action gets batch_rollouts rollouts per
+        world. Actions are bids or cards, depending on the phase. Returns (scores, counts) dicts keyed by action.
+        """
+        scores = defaultdict(float)
+        counts = defaultdict(int)
+        evaluate = self.evaluate_bid if game_state.phase == GamePhase.BIDDING else self.evaluate_card_play
+        
+        for world_hands, seed in zip(hands, seeds):
+            if time.time() > deadline:
+                break
+            
+            det_state = game_state.clone()
+            for name, hand in zip(game_state.player_names, world_hands.tolist()):
+                det_state.players[name]["hand"] = hand
+            
+            for action in actions:
+                if time.time() > deadline:
+                    break
+                
+                rng = np.random.default_rng(seed)
+                scores[action] += evaluate(det_state, action, rng)
+                counts[action] += 1
+        return scores, counts
+    
+    def evaluate_determinizations(self, game_state, actions, deadline):
+        """Score every action over as many determinizations as fit before ``deadline``
+        
+        The worlds and their rollout seeds are sampled up front as one pool.
+        With workers > 1 the pool is dealt to the process pool in chunks of
+        chunk_worlds, two chunks per worker in flight, and the scores are
+        summed here. Every worker stops at the same deadline. A failed chunk
+        raises its exception here.
+        """
+        determinizations = 1000
+        hands, seeds = self.sample_world_pool(game_state, determinizations,
+                                              np.random.default_rng(random.getrandbits(64)))
+        if self.workers <= 1:
+            return self.evaluate_worlds(game_state, actions, hands, seeds, deadline)
+        
+        scores = defaultdict(float)
+        counts = defaultdict(int)
+        pool = get_pool(self.workers)
+        settings = self.worker_settings()
+        pending = set()
+        submitted = 0
+        while True:
+            while submitted < determinizations and len(pending) < 2 * self.workers and time.time() < deadline:
+                chunk = slice(submitted, submitted + self.chunk_worlds)
+                pending.add(pool.submit(evaluate_chunk, game_state, self.player_name, settings, actions,
+                                        hands[chunk], seeds[chunk], deadline))
+                submitted += self.chunk_worlds
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    chunk_scores, chunk_counts = future.result()
+                except Exception:
+                    # Scores without the failed chunk would lean on the other worlds; let the caller fall back
+                    for other in pending:
+                        other.cancel()
+                    raise
+                for action, score in chunk_scores.items():
+                    scores[action] += score
+                    counts[action] += chunk_counts[action]
+        return scores, counts
+    
     def simple_bid_heuristic(self, game_state):
         """Simple bidding heuristic as fallback"""
         hand = game_state.players[self.player_name]["hand"]
         
         # Count strong cards
         strong_cards = 0
-        for card in hand:
-            if card == "Wizard":
+        for card in hand_cards(hand):
+            if is_wizard(card):
                 strong_cards += 1
-            elif card != "Fool":
-                rank = int(card[:-1])
+            elif not is_fool(card):
+                rank = CARD_RANK[card]
                 if rank >= 10:  # High cards
                     strong_cards += 0.7
                 elif rank >= 7:  # Medium cards
@@ -263,107 +643,45 @@ class ISMCTSAIPlayer:
         base_bid = min(game_state.round_num, int(strong_cards + 0.5))
         return max(0, min(game_state.round_num, base_bid + random.randint(-1, 1)))
     
-    def evaluate_bid(self, det_state, bid, iterations):
+    def evaluate_bid(self, det_state, bid, rng=None):
         """Evaluate a specific bid using limited ISMCTS"""
         try:
             # Create state with this bid
-            temp_state = copy.deepcopy(det_state)
+            temp_state = det_state.clone()
             temp_state.process_bid(bid)
             
-            # Quick simulation-based evaluation instead of full ISMCTS
-            wins = 0
-            total_sims = min(iterations, 50)  # Limit simulations
-            
-            for _ in range(total_sims):
-                sim_state = copy.deepcopy(temp_state)
-                result = self.quick_simulate(sim_state)
-                if result and self.player_name in result:
-                    scores = list(result.values())
-                    ai_score = result[self.player_name]
-                    avg_score = sum(scores) / len(scores)
-                    if ai_score >= avg_score:
-                        wins += 1
-            
-            return wins / total_sims if total_sims > 0 else 0.5
+            # Batched simulation-based evaluation instead of full ISMCTS
+            return rollout_win_rate(temp_state, self.player_name, self.batch_rollouts, rng)
             
         except Exception as e:
             return 0.5  # Neutral score if evaluation fails
     
-    def quick_simulate(self, game_state):
-        """Quick simulation to end of round"""
-        try:
-            max_moves = 50
-            moves_made = 0
-            
-            while not game_state.is_terminal() and moves_made < max_moves:
-                if game_state.phase == GamePhase.BIDDING:
-                    # Make random bids for remaining players
-                    current_player = game_state.get_current_player()
-                    if current_player not in game_state.bids:
-                        bid = random.randint(0, game_state.round_num)
-                        game_state.process_bid(bid)
-                elif game_state.phase == GamePhase.PLAYING:
-                    # Play random legal cards
-                    current_player = game_state.get_current_player()
-                    legal_cards = [card for card in game_state.players[current_player]["hand"]
-                                 if game_state.can_play_card(card, current_player)]
-                    if legal_cards:
-                        card = random.choice(legal_cards)
-                        game_state.play_card(card, current_player)
-                    else:
-                        break
-                else:
-                    break
-                    
-                moves_made += 1
-            
-            return game_state.get_final_scores()
-            
-        except Exception as e:
-            return {}
-    
-    def get_card_play(self, game_state):
-        """Use ISMCTS to determine the best card to play"""
+    def get_card_play(self, game_state, callback=None):
+        """Use ISMCTS to determine the best card to play
+        
+        ``callback`` receives the search's progress reports (see search_progress).
+        """
         start_time = time.time()
         
         try:
-            # Get legal cards
-            player_hand = game_state.players[self.player_name]["hand"]
-            legal_cards = [card for card in player_hand 
-                          if game_state.can_play_card(card, self.player_name)]
+            # Get legal cards, one per class of equivalent cards
+            legal_cards = game_state.get_distinct_cards(self.player_name)
             
             if len(legal_cards) == 1:
                 return legal_cards[0]
             
             if not legal_cards:
-                return player_hand[0] if player_hand else None
+                return None
             
-            # Run ISMCTS with multiple determinizations for card play
-            card_scores = defaultdict(float)
-            card_counts = defaultdict(int)
+            if self.search == "so-ismcts":
+                action = self.run_ismcts(game_state, self.iterations, self.time_limit * 0.9, callback)
+                if action is not None:
+                    return action['card']
+                return self.simple_card_heuristic(game_state, legal_cards)
             
-            '''  # Use fewer determinizations for card play to save time
-            determinizations = min(3, max(1, self.card_play_iterations // 100))
-            iterations_per_det = max(20, self.card_play_iterations // determinizations)'''
-
-            determinizations = 1000
-            iterations_per_det = 100
-
-
-            for det_num in range(determinizations):
-                if time.time() - start_time > self.time_limit * 0.9:
-                    break
-                    
-                det_state = self.determinize_game_state(game_state, self.player_name)
-                
-                # Evaluate each legal card using ISMCTS
-                for card in legal_cards:
-                    if time.time() - start_time > self.time_limit * 0.9:
-                        break
-                    
-                    score = self.evaluate_card_play(det_state, card, iterations_per_det // len(legal_cards))
-                    card_scores[card] += score
-                    card_counts[card] += 1
+            # Evaluate every card on many determinizations, spread over the workers
+            card_scores, card_counts = self.evaluate_determinizations(game_state, legal_cards,
+                                                                      start_time + self.time_limit * 0.9)
             
             # Choose best card
             if card_scores:
@@ -378,37 +696,22 @@ class ISMCTSAIPlayer:
         except Exception as e:
             # Fallback to simple heuristic
             print('Fallack Play Exception')
-            player_hand = game_state.players[self.player_name]["hand"]
-            legal_cards = [card for card in player_hand 
-                          if game_state.can_play_card(card, self.player_name)]
+            legal_cards = game_state.get_legal_cards(self.player_name)
             return self.simple_card_heuristic(game_state, legal_cards) if legal_cards else None
     
-    def evaluate_card_play(self, det_state, card, iterations):
-        """Evaluate a specific card play using ISMCTS"""
+    def evaluate_card_play(self, det_state, card, rng=None):
+        """Evaluate a specific card play using batched rollouts, or exactly in the endgame"""
         try:
             # Create state after playing this card
-            temp_state = copy.deepcopy(det_state)
+            temp_state = det_state.clone()
             temp_state.play_card(card, self.player_name)
             
-            # Run ISMCTS from this state
-            best_action = self.run_ismcts(temp_state, iterations, self.time_limit * 0.1)
+            if self.in_endgame(temp_state):
+                scores = solved_scores(temp_state)
+                return float(scores[self.player_name] >= sum(scores.values()) / len(scores))
             
-            # Run multiple simulations to get average score
-            wins = 0
-            total_sims = min(iterations // 2, 25)  # Limit simulations
-            
-            for _ in range(total_sims):
-                sim_state = copy.deepcopy(temp_state)
-                result = self.quick_simulate(sim_state)
-                if result and self.player_name in result:
-                    scores = list(result.values())
-                    ai_score = result[self.player_name]
-                    avg_score = sum(scores) / len(scores)
-                    # Normalize score
-                    if ai_score >= avg_score:
-                        wins += 1
-            
-            return wins / total_sims if total_sims > 0 else 0.5
+            # Run batched simulations to get the average outcome
+            return rollout_win_rate(temp_state, self.player_name, self.batch_rollouts, rng)
             
         except Exception as e:
             return 0.5  # Neutral score if evaluation fails
@@ -421,7 +724,7 @@ class ISMCTSAIPlayer:
                 
             # If we have a Wizard, play it
             for card in legal_cards:
-                if card == "Wizard":
+                if is_wizard(card):
                     return card
             
             # Analyze the current trick
@@ -432,29 +735,29 @@ class ISMCTSAIPlayer:
             # If we're leading, play strategically
             if not played_cards:
                 # Lead with high card if we want to win, low if we want to lose
-                non_special = [c for c in legal_cards if c not in ["Wizard", "Fool"]]
+                non_special = [c for c in legal_cards if not is_special(c)]
                 if non_special:
-                    non_special.sort(key=lambda x: int(x[:-1]))
+                    non_special.sort(key=lambda x: CARD_RANK[x])
                     return non_special[-1]  # Play highest
                 return legal_cards[0]
             
             # If following, try to follow suit appropriately
-            if led_suit:
-                suit_cards = [c for c in legal_cards if c != "Fool" and c != "Wizard" and c[-1] == led_suit]
+            if led_suit is not None:
+                suit_cards = [c for c in legal_cards if CARD_SUIT[c] == led_suit]
                 if suit_cards:
                     # Play lowest if we don't want the trick, highest if we do
-                    suit_cards.sort(key=lambda x: int(x[:-1]))
+                    suit_cards.sort(key=lambda x: CARD_RANK[x])
                     return suit_cards[0]  # Play lowest for now
             
             # Play Fool if available (doesn't win but doesn't waste good card)
             for card in legal_cards:
-                if card == "Fool":
+                if is_fool(card):
                     return card
             
             # Play lowest card
-            non_special = [c for c in legal_cards if c not in ["Wizard", "Fool"]]
+            non_special = [c for c in legal_cards if not is_special(c)]
             if non_special:
-                non_special.sort(key=lambda x: int(x[:-1]))
+                non_special.sort(key=lambda x: CARD_RANK[x])
                 return non_special[0]
             
             return legal_cards[0]
@@ -473,6 +776,12 @@ class ISMCTSWizardGame(WizardGame):
                 
                 self.ai_players[player_name] = ISMCTSAIPlayer(player_name)
     
+    def __getstate__(self):
+        """Pickle without the AI players (and their search trees) for process pool workers"""
+        state = self.__dict__.copy()
+        state["ai_players"] = {}
+        return state
+    
     def get_current_player(self):
         """Get the current player name"""
         if 0 <= self.current_player_index < len(self.player_names):
@@ -497,16 +806,14 @@ class ISMCTSWizardGame(WizardGame):
                         'player': current_player
                     })
             elif self.phase == GamePhase.PLAYING:
-                # Legal cards to play
+                # Legal cards to play, one per class of equivalent cards
                 if current_player in self.players:
-                    player_hand = self.players[current_player]["hand"]
-                    for card in player_hand:
-                        if self.can_play_card(card, current_player):
-                            actions.append({
-                                'type': 'play_card',
-                                'card': card,
-                                'player': current_player
-                            })
+                    for card in self.get_distinct_cards(current_player):
+                        actions.append({
+                            'type': 'play_card',
+                            'card': card,
+                            'player': current_player
+                        })
         except Exception as e:
             pass
         
@@ -520,48 +827,18 @@ class ISMCTSWizardGame(WizardGame):
         """Get final scores for terminal evaluation"""
         return self.scores.copy()
     
-    def update(self):
-        """Override update to use ISMCTS AI"""
-        current_time = pygame.time.get_ticks()
-        
-        # Handle next round timer
-        if self.next_round_timer > 0 and current_time >= self.next_round_timer:
-            self.next_round_timer = 0
-            self.start_new_round()
-        
-        # Handle AI moves with ISMCTS
-        if self.phase == GamePhase.BIDDING:
-            current_player = self.player_names[self.current_player_index]
-            if not self.players[current_player]["is_human"]:
-                if self.ai_timer == 0:
-                    self.ai_timer = current_time + 500  # Half second delay for UI
-                elif current_time >= self.ai_timer:
-                    self.ai_timer = 0
-                    try:
-                        # Use ISMCTS for bidding
-                        ai_bid = self.ai_players[current_player].get_bid(self)
-                        self.process_bid(ai_bid)
-                    except Exception as e:
-                        # Fallback to random bid
-                        ai_bid = random.randint(0, self.round_num)
-                        self.process_bid(ai_bid)
-        
-        elif self.phase == GamePhase.PLAYING:
-            current_player = self.player_names[self.current_player_index]
-            if not self.players[current_player]["is_human"]:
-                if self.ai_timer == 0:
-                    self.ai_timer = current_time + 1000  # Longer delay for card play ISMCTS
-                elif current_time >= self.ai_timer:
-                    self.ai_timer = 0
-                    try:
-                        # Use ISMCTS for card play
-                        card_to_play = self.ai_players[current_player].get_card_play(self)
-                        if card_to_play:
-                            self.play_card(card_to_play, current_player)
-                    except Exception as e:
-                        # Fallback to first legal card
-                        hand = self.players[current_player]["hand"]
-                        legal_cards = [card for card in hand 
-                                     if self.can_play_card(card, current_player)]
-                        if legal_cards:
-                            self.play_card(legal_cards[0], current_player)
\ No newline at end of file
+    def choose_ai_bid(self, player_name):
+        """Use ISMCTS for bidding"""
+        try:
+            return self.ai_players[player_name].get_bid(self)
+        except Exception as e:
+            # Fallback to random bid
+            return random.randint(0, self.round_num)
+    
+    def choose_ai_card(self, player_name):
+        """Use ISMCTS for card play"""
+        try:
+            return self.ai_players[player_name].get_card_play(self)
+        except Exception as e:
+            # Fallback to first legal card
+            return super().choose_ai_card(player_name)
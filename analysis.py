@@ -0,0 +1,127 @@
+"""Background "Show Best Move" analysis.
+
+One long-lived process runs the analysis searches. Submitting a new position
+cancels the job in progress, and the anytime search posts the root's visit
+shares after every batch of iterations, so the suggestion refreshes while it
+thinks.
+"""
+import atexit
+import multiprocessing
+import os
+import queue
+
+from ai import ISMCTSAIPlayer
+from cards import card_name
+from search_tree import BID_CODE
+
+
+def move_text(code):
+    """Display string for an action code"""
+    if code >= BID_CODE:
+        return f"Bid {code - BID_CODE}"
+    return f"Play {card_name(code)}"
+
+
+def describe(codes, visits, done, top=3):
+    """Suggestion text: the leading moves with their share of the root visits"""
+    total = sum(visits)
+    if not total:
+        return "No valid move" if done else "Calculating..."
+    ranked = sorted(zip(codes, visits), key=lambda item: item[1], reverse=True)[:top]
+    text = ", ".join(f"{move_text(code)} ({count / total:.0%})" for code, count in ranked)
+    return text if done else f"{text}  [{total} sims...]"
+
+
+def _run_job(job_id, game_state, player_name, settings, updates, current_job):
+    """Search one position, posting the root statistics after every batch until done or cancelled"""
+    ai_player = ISMCTSAIPlayer(player_name, settings["iterations"], settings["workers"])
+    ai_player.parallel = "tree"
+    ai_player.progress_batch = settings["batch"]
+    codes, visits = [], []
+    for progress in ai_player.search_progress(game_state, settings["iterations"], settings["time_limit"]):
+        if current_job.value != job_id:
+            return
+        codes, visits = list(progress["visits"]), list(progress["visits"].values())
+        updates.put((job_id, codes, visits, False, None))
+    updates.put((job_id, codes, visits, True, None))
+
+
+def _serve(requests, updates, current_job):
+    """Analysis process main loop: run the newest request, skipping any that are already stale"""
+    while True:
+        job = requests.get()
+        while job is not None:
+            try:
+                job = requests.get_nowait()
+            except queue.Empty:
+                break
+        if job is None:
+            return
+        job_id = job[0]
+        if current_job.value != job_id:
+            continue  # Cancelled before it started
+        try:
+            _run_job(*job, updates, current_job)
+        except Exception as e:
+            updates.put((job_id, [], [], True, repr(e)))
+
+
+class AnalysisService:
+    """Runs "Show Best Move" searches in a separate process, one job at a time"""
+    def __init__(self, iterations=10000, time_limit=5.0, workers=None, batch=250):
+        self.settings = {
+            "iterations": iterations,
+            "time_limit": time_limit,
+            "workers": workers or os.cpu_count() or 1,
+            "batch": batch,  # Iterations between suggestion updates
+        }
+        self.job_id = 0
+        self.position = None  # Position of the current job
+        # Spawned, not forked: the UI process already runs the AI thread and SDL
+        context = multiprocessing.get_context("spawn")
+        self.requests = context.Queue()
+        self.updates = context.Queue()
+        self.current_job = context.Value("i", 0)
+        # Not a daemon, so it may start its own rollout workers; close() stops it
+        self.process = context.Process(target=_serve, args=(self.requests, self.updates, self.current_job))
+        self.process.start()
+        atexit.register(self.close)
+
+    def submit(self, game_state, player_name, position=None):
+        """Start analysing a position for ``player_name``, cancelling the previous job"""
+        self.job_id += 1
+        self.position = position
+        self.current_job.value = self.job_id
+        self.requests.put((self.job_id, game_state.clone(), player_name, self.settings))
+
+    def cancel(self):
+        """Stop the current job; its late updates are ignored"""
+        self.job_id += 1
+        self.position = None
+        self.current_job.value = self.job_id
+
+    def poll(self):
+        """Newest suggestion text for the current job, or None if nothing new arrived
+
+        A job that raised shows its exception instead.
+        """
+        latest = None
+        while True:
+            try:
+                job_id, codes, visits, done, error = self.updates.get_nowait()
+            except queue.Empty:
+                return latest
+            if job_id != self.job_id:
+                continue
+            if error is not None:
+                print(f'Analysis failed: {error}')
+                latest = f"Analysis failed: {error}"
+            else:
+                latest = describe(codes, visits, done)
+
+    def close(self):
+        """Stop the analysis process"""
+        if self.process.is_alive():
+            self.cancel()
+            self.requests.put(None)
+            self.process.join(timeout=5)
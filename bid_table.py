@@ -0,0 +1,194 @@
+"""Precomputed bid tables.
+
+Offline, many random deals are played out with batched random rollouts and
+every dealt hand is reduced to a few features: round size, player count,
+seat in the bidding order, Wizards, Fools, trump length and trump honours,
+and the high cards of the other suits (sorted, so the suits are
+interchangeable). For each feature key the table stores how often a hand
+like it took 0, 1, 2, ... tricks.
+
+The table is a flat binary file: a header, the sorted keys, the sample
+counts and the quantized trick distributions, one column after the other.
+At runtime it is memory-mapped and a lookup is one binary search, so a bid
+costs well under a millisecond. Generate it with:
+
+    python bid_table.py --deals 20000
+"""
+import argparse
+import os
+import time
+import warnings
+
+import numpy as np
+
+from cards import DECK_SIZE, NUM_RANKS, NUM_REGULAR, NUM_SUITS
+from rollout import play_tricks, unpack_hands
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bid_table.bin")
+MAGIC = b"WZBT"
+VERSION = 1
+HEADER = np.dtype([("magic", "S4"), ("version", "<u4"), ("count", "<u4"), ("reserved", "<u4")])
+MAX_TRICKS = 21  # Trick counts 0..20
+PROB_SCALE = 65535  # Probabilities are stored as uint16 fractions of this
+
+_tables = {}
+
+
+def feature_keys(hands, trump, round_num, num_players, seats):
+    """Feature key of every hand
+
+    hands  (K, P, 60) bool
+    trump  (K,) suit index, -1 for no trump
+    seats  (P,) position of each player in the bidding order, 0 being left of the dealer
+    """
+    hands = np.asarray(hands)
+    num_worlds = hands.shape[0]
+    suits = hands[..., :NUM_REGULAR].reshape(num_worlds, -1, NUM_SUITS, NUM_RANKS)
+    wizards = hands[..., 52:56].sum(axis=-1)
+    fools = hands[..., 56:60].sum(axis=-1)
+
+    trump = np.asarray(trump)[:, None]
+    no_trump = trump < 0
+    is_trump = np.arange(NUM_SUITS) == trump[..., None]  # (K, 1, 4)
+    trump_count = np.where(no_trump, 0, np.minimum((suits.sum(axis=-1) * is_trump).sum(axis=-1), 7))
+    trump_high = np.where(no_trump, 0, (suits[..., 9:].sum(axis=-1) * is_trump).sum(axis=-1))
+    # Jacks, Queens and Kings of the other suits, highest suit first
+    side_high = np.sort(np.where(is_trump, 0, suits[..., 10:].sum(axis=-1)), axis=-1)[..., ::-1]
+
+    key = np.full(wizards.shape, round_num, dtype=np.uint64)
+    for value, bits in ((num_players, 3), (np.asarray(seats)[None, :], 3), (wizards, 3), (fools, 3),
+                        (no_trump, 1), (trump_count, 3), (trump_high, 3),
+                        (side_high[..., 0], 2), (side_high[..., 1], 2), (side_high[..., 2], 2),
+                        (side_high[..., 3], 2)):
+        key = (key << np.uint64(bits)) | np.asarray(value).astype(np.uint64)
+    return key
+
+
+def hand_key(hand, trump, round_num, num_players, seat):
+    """Feature key of one hand bitmask (trump None for no trump)"""
+    hands = unpack_hands([[hand]])
+    return int(feature_keys(hands, [-1 if trump is None else trump], round_num, num_players, [seat])[0, 0])
+
+
+def expected_scores(probs):
+    """Expected round score of every bid 0..len(probs)-1 for a trick distribution"""
+    tricks = np.arange(len(probs))
+    bids = tricks[:, None]
+    scores = np.where(bids == tricks, 20 + 10 * tricks, -10 * np.abs(bids - tricks))
+    return scores @ probs
+
+
+class BidTable:
+    """A memory-mapped bid table file"""
+    def __init__(self, path, min_samples=50):
+        header = np.fromfile(path, dtype=HEADER, count=1)
+        if not len(header) or header["magic"][0] != MAGIC or header["version"][0] != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} bid table")
+        count = int(header["count"][0])
+        offset = HEADER.itemsize
+        self.keys = np.memmap(path, dtype="<u8", mode="r", offset=offset, shape=(count,))
+        offset += self.keys.nbytes
+        self.samples = np.memmap(path, dtype="<u4", mode="r", offset=offset, shape=(count,))
+        offset += self.samples.nbytes
+        self.probs = np.memmap(path, dtype="<u2", mode="r", offset=offset, shape=(count, MAX_TRICKS))
+        self.min_samples = min_samples  # Entries seen fewer times than this are treated as missing
+
+    def distribution(self, key):
+        """Probability of taking 0..20 tricks for a feature key, or None if the table doesn't know it"""
+        index = int(np.searchsorted(self.keys, key))
+        if index == len(self.keys) or self.keys[index] != key or self.samples[index] < self.min_samples:
+            return None
+        return self.probs[index] / PROB_SCALE
+
+    def expected_scores(self, hand, trump, round_num, num_players, seat):
+        """Expected round score of every legal bid for a hand, or None if the table doesn't know it"""
+        probs = self.distribution(hand_key(hand, trump, round_num, num_players, seat))
+        if probs is None:
+            return None
+        return expected_scores(probs[:round_num + 1])
+
+
+def load_bid_table(path=DEFAULT_PATH):
+    """The bid table at ``path``, mapped once per process; None if it hasn't been generated or can't be read"""
+    if path not in _tables:
+        table = None
+        if os.path.isfile(path):
+            try:
+                table = BidTable(path)
+            except (OSError, ValueError) as e:
+                warnings.warn(f"Ignoring bid table: {e}")
+        _tables[path] = table
+    return _tables[path]
+
+
+def simulate(num_players, round_num, deals, rng):
+    """Deal and play out ``deals`` random rounds; returns the (deals * P) feature keys and tricks taken"""
+    shuffled = rng.random((deals, DECK_SIZE)).argsort(axis=1)
+    dealt = shuffled[:, :num_players * round_num].reshape(deals, num_players, round_num)
+    hands = np.zeros((deals, num_players, DECK_SIZE), dtype=bool)
+    np.put_along_axis(hands, dealt, True, axis=-1)
+
+    # Dealer is player 0; the top card of the rest sets trump, except in the last round
+    trump = np.full(deals, -1)
+    if round_num < DECK_SIZE // num_players:
+        top = shuffled[:, num_players * round_num]
+        trump = np.where(top < NUM_REGULAR, top // NUM_RANKS, -1)
+        trump = np.where((top >= 52) & (top < 56), rng.integers(0, NUM_SUITS, size=deals), trump)
+    seats = (np.arange(num_players) - 1) % num_players
+
+    keys = feature_keys(hands, trump, round_num, num_players, seats)
+    tricks = play_tricks(hands, trump, np.ones(deals, dtype=int), np.full((deals, num_players), -1),
+                         np.zeros((deals, num_players), dtype=int), rng)
+    return keys.ravel(), tricks.ravel()
+
+
+def build_table(players, deals, batch, rng, verbose=True):
+    """Simulate every round of every player count; returns the sorted keys and their (N, 21) trick counts"""
+    all_keys = []
+    all_tricks = []
+    for num_players in players:
+        for round_num in range(1, DECK_SIZE // num_players + 1):
+            start = time.perf_counter()
+            for done in range(0, deals, batch):
+                keys, tricks = simulate(num_players, round_num, min(batch, deals - done), rng)
+                all_keys.append(keys)
+                all_tricks.append(tricks)
+            if verbose:
+                print(f"{num_players} players, round {round_num:>2}: {time.perf_counter() - start:.1f}s")
+
+    keys = np.concatenate(all_keys)
+    tricks = np.concatenate(all_tricks)
+    unique, inverse = np.unique(keys, return_inverse=True)
+    counts = np.zeros((len(unique), MAX_TRICKS), dtype=np.int64)
+    np.add.at(counts, (inverse.ravel(), tricks), 1)
+    return unique, counts
+
+
+def write_table(path, keys, counts):
+    """Write sorted keys and their trick counts as a bid table file"""
+    samples = counts.sum(axis=1)
+    probs = np.rint(counts / samples[:, None] * PROB_SCALE).astype("<u2")
+    header = np.array([(MAGIC, VERSION, len(keys), 0)], dtype=HEADER)
+    with open(path, "wb") as f:
+        f.write(header.tobytes())
+        f.write(keys.astype("<u8").tobytes())
+        f.write(np.minimum(samples, np.iinfo(np.uint32).max).astype("<u4").tobytes())
+        f.write(probs.tobytes())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the precomputed bid table")
+    parser.add_argument("--deals", type=int, default=20000, help="random deals per player count and round")
+    parser.add_argument("--players", type=int, nargs="+", default=[3, 4, 5, 6], choices=range(3, 7))
+    parser.add_argument("--batch", type=int, default=4096, help="deals played out at once")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--out", default=DEFAULT_PATH, help="output file")
+    args = parser.parse_args()
+
+    keys, counts = build_table(args.players, args.deals, args.batch, np.random.default_rng(args.seed))
+    write_table(args.out, keys, counts)
+    print(f"{len(keys)} entries, {os.path.getsize(args.out) / 1e6:.1f} MB written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Public card knowledge for the round in progress.
+
+WizardGame updates its CardTracker on every card played, so the AI can
+read off which cards are still unseen, how many cards each player holds
+and which suits a player is known to be out of, without replaying the
+round. Every play is reversible with unplay() for apply()/undo() search.
+"""
+from cards import CARD_BIT, CARD_SUIT, FULL_DECK_MASK, NUM_REGULAR, NUM_SUITS, SUIT_MASKS, permute_mask
+
+# Suit bitmask (bit s = void in suit s) -> card mask of those suits
+VOID_CARD_MASKS = tuple(
+    sum(SUIT_MASKS[suit] for suit in range(NUM_SUITS) if voids >> suit & 1)
+    for voids in range(1 << NUM_SUITS)
+)
+
+
+class CardTracker:
+    def __init__(self, num_players=0, hand_size=0, trump_card=None):
+        self.played = 0  # Cards played this round, current trick included
+        self.exposed = CARD_BIT[trump_card] if trump_card is not None else 0  # Turned-up trump card
+        self.voids = [0] * num_players  # Per player: bit s set once they failed to follow suit s
+        self.hand_sizes = [hand_size] * num_players
+        self.history = []  # (player index, voids before the play), for unplay()
+
+    def copy(self):
+        """Copy for a cloned game; the copy can't unplay cards played before it was made"""
+        new = CardTracker.__new__(CardTracker)
+        new.played = self.played
+        new.exposed = self.exposed
+        new.voids = self.voids[:]
+        new.hand_sizes = self.hand_sizes[:]
+        new.history = []
+        return new
+
+    def permuted(self, perm):
+        """Copy with the suits relabelled by ``perm`` (see cards.suit_permutation)"""
+        new = self.copy()
+        new.played = permute_mask(self.played, perm)
+        new.exposed = permute_mask(self.exposed, perm)
+        new.voids = [sum(1 << perm[suit] for suit in range(NUM_SUITS) if voids >> suit & 1) for voids in self.voids]
+        return new
+
+    def play(self, player_index, card, led_suit):
+        """Record a card played while ``led_suit`` was led (None if no suit was led yet)"""
+        self.history.append((player_index, self.voids[player_index]))
+        self.played |= CARD_BIT[card]
+        self.hand_sizes[player_index] -= 1
+        # Wizards and Fools are always legal, so only a regular card of another suit shows a void
+        if led_suit is not None and card < NUM_REGULAR and CARD_SUIT[card] != led_suit:
+            self.voids[player_index] |= 1 << led_suit
+
+    def unplay(self, card):
+        """Take back the last play()"""
+        player_index, voids = self.history.pop()
+        self.played &= ~CARD_BIT[card]
+        self.hand_sizes[player_index] += 1
+        self.voids[player_index] = voids
+
+    def unseen(self, own_hand):
+        """Cards the owner of ``own_hand`` hasn't seen: still in someone else's hand or undealt"""
+        return FULL_DECK_MASK & ~self.played & ~self.exposed & ~own_hand
+
+    def void_mask(self, player_index):
+        """Cards ``player_index`` is known not to hold"""
+        return VOID_CARD_MASKS[self.voids[player_index]]
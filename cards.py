@@ -0,0 +1,162 @@
+"""Compact card encoding used inside the rules engine and the AI.
+
+Every card is a small int in ``range(60)``:
+
+    0-51   regular cards, ``suit * 13 + (rank - 1)``
+    52-55  Wizards
+    56-59  Fools
+
+Hands are int bitmasks over those 60 ids, so a suit-follow check is a
+single mask AND. Strings like ``"12R"`` are only produced at the UI/log
+boundary with ``card_name``.
+"""
+
+SUITS = ('R', 'G', 'B', 'Y')  # Red, Green, Blue, Yellow
+NUM_SUITS = 4
+NUM_RANKS = 13
+NUM_REGULAR = NUM_SUITS * NUM_RANKS
+DECK_SIZE = 60
+
+WIZARDS = tuple(range(52, 56))
+FOOLS = tuple(range(56, 60))
+
+FULL_DECK_MASK = (1 << DECK_SIZE) - 1
+SUIT_MASKS = tuple(((1 << NUM_RANKS) - 1) << (suit * NUM_RANKS) for suit in range(NUM_SUITS))
+WIZARD_MASK = 0xF << 52
+FOOL_MASK = 0xF << 56
+SPECIAL_MASK = WIZARD_MASK | FOOL_MASK
+
+# Lookup tables indexed by card id (None for Wizards and Fools)
+CARD_SUIT = tuple(card // NUM_RANKS if card < NUM_REGULAR else None for card in range(DECK_SIZE))
+CARD_RANK = tuple(card % NUM_RANKS + 1 if card < NUM_REGULAR else None for card in range(DECK_SIZE))
+CARD_BIT = tuple(1 << card for card in range(DECK_SIZE))
+
+
+def is_wizard(card):
+    return 52 <= card < 56
+
+
+def is_fool(card):
+    return card >= 56
+
+
+def is_special(card):
+    return card >= NUM_REGULAR
+
+
+def card_name(card):
+    """Display string for a card id, e.g. ``"12R"``, ``"Wizard"`` or ``"Fool"``"""
+    if card is None:
+        return "None"
+    if card >= 56:
+        return "Fool"
+    if card >= 52:
+        return "Wizard"
+    return f"{CARD_RANK[card]}{SUITS[CARD_SUIT[card]]}"
+
+
+def suit_name(suit):
+    """Display string for a suit index"""
+    return SUITS[suit] if suit is not None else None
+
+
+def hand_cards(mask):
+    """List the card ids in a bitmask, lowest id first"""
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(low.bit_length() - 1)
+        mask ^= low
+    return cards
+
+
+def hand_mask(cards):
+    """Bitmask for an iterable of card ids"""
+    mask = 0
+    for card in cards:
+        mask |= CARD_BIT[card]
+    return mask
+
+
+def legal_mask(hand, led_suit):
+    """Cards in ``hand`` that may be played when ``led_suit`` was led"""
+    if led_suit is None:
+        return hand
+    follow = hand & SUIT_MASKS[led_suit]
+    if follow:
+        return follow | (hand & SPECIAL_MASK)
+    return hand
+
+
+SUIT_BITS = (1 << NUM_RANKS) - 1
+
+
+def suit_permutation(masks, trump=None):
+    """Suit relabelling that puts the card masks ``masks`` in canonical form
+
+    Apart from trump, suits are interchangeable: positions that differ only
+    by a relabelling of the other suits play the same. The trump suit becomes
+    suit 0 and the other suits follow, ordered by their cards in ``masks``
+    (compared mask by mask, highest first). Returns ``perm`` with
+    ``perm[old suit] = new suit``.
+    """
+    def content(suit):
+        return tuple(mask >> (suit * NUM_RANKS) & SUIT_BITS for mask in masks)
+
+    others = sorted((suit for suit in range(NUM_SUITS) if suit != trump), key=content, reverse=True)
+    perm = [0] * NUM_SUITS
+    for new, old in enumerate(([] if trump is None else [trump]) + others):
+        perm[old] = new
+    return tuple(perm)
+
+
+def invert_permutation(perm):
+    """Permutation that undoes ``perm``"""
+    inverse = [0] * len(perm)
+    for old, new in enumerate(perm):
+        inverse[new] = old
+    return tuple(inverse)
+
+
+def permute_suit(suit, perm):
+    """Relabelled suit index (None stays None)"""
+    return None if suit is None else perm[suit]
+
+
+def permute_card(card, perm):
+    """Relabelled card id; Wizards and Fools keep theirs"""
+    if card >= NUM_REGULAR:
+        return card
+    return perm[card // NUM_RANKS] * NUM_RANKS + card % NUM_RANKS
+
+
+def permute_mask(mask, perm):
+    """Card bitmask with its suits relabelled"""
+    result = mask & SPECIAL_MASK
+    for suit, new in enumerate(perm):
+        result |= (mask >> (suit * NUM_RANKS) & SUIT_BITS) << (new * NUM_RANKS)
+    return result
+
+
+REGULAR_MASK = (1 << NUM_REGULAR) - 1
+SUIT_LOW_BITS = sum(1 << (suit * NUM_RANKS) for suit in range(NUM_SUITS))
+
+
+def class_representatives(legal, hand, gone):
+    """One card of ``legal`` per class of strategically equivalent cards
+
+    All Wizards play alike, and so do all Fools. Two cards of a suit are
+    alike when every rank between them is in ``hand`` too or ``gone`` (out of
+    play for good, e.g. played in finished tricks). The lowest card of each
+    class represents it.
+    """
+    # Hand cards with a hand card below them in the same run of hand-or-gone ranks
+    propagate = (hand | gone) & REGULAR_MASK & ~SUIT_LOW_BITS
+    covered = (hand << 1) & propagate
+    for shift in (1, 2, 4, 8):
+        covered |= propagate & (covered << shift)
+        propagate &= propagate << shift
+    result = legal & REGULAR_MASK & ~covered
+    for specials in (legal & WIZARD_MASK, legal & FOOL_MASK):
+        result |= specials & -specials
+    return result
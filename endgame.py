@@ -0,0 +1,128 @@
+"""Exact play of the last tricks of a determinized round.
+
+In a determinization every hand is known, and once only a few cards are
+left the rest of the round can be searched completely. solve() finds the
+max^n outcome: each player in turn plays the card that gives them the best
+round score, assuming everyone after them does the same. Positions are
+memoised on the remaining hands, the current trick and the tricks each
+player still needs, so card orders that reach the same position are solved
+once.
+
+The search runs on the canonical relabelling of the suits (trump first,
+see cards.suit_permutation), so deals that differ only by which side suit
+is which share their memo entries. Ties go to the lowest card id of that
+relabelling.
+"""
+from cards import (CARD_BIT, CARD_SUIT, FULL_DECK_MASK, NUM_REGULAR, class_representatives, hand_cards,
+                   hand_mask, is_wizard, legal_mask, permute_card, permute_mask, permute_suit, suit_permutation)
+from game_state import GamePhase
+
+MEMO_LIMIT = 1 << 14  # Positions kept before the memo is cleared (a few MB, in every worker process)
+
+_memo = {}
+
+
+def cards_left(game_state):
+    """Cards still in the players' hands"""
+    return sum(game_state.tracker.hand_sizes)
+
+
+def led_suit(trick):
+    """Suit of the first regular card in ``trick``, None if there is none yet"""
+    for card in trick:
+        if card < NUM_REGULAR:
+            return CARD_SUIT[card]
+    return None
+
+
+def trick_winner(trick, leader, trump):
+    """Index of the player who wins a full trick, ``trick`` listing the cards in play order from ``leader``"""
+    led = led_suit(trick)
+    best = -1
+    best_position = 0  # Only Fools: the first one wins
+    for position, card in enumerate(trick):
+        if is_wizard(card):
+            best_position = position  # First Wizard wins
+            break
+        if card < NUM_REGULAR:
+            # Card ids within a suit are ordered by rank
+            suit = CARD_SUIT[card]
+            strength = 200 + card if suit == trump else 100 + card if suit == led else -1
+            if strength > best:
+                best = strength
+                best_position = position
+    return (leader + best_position) % len(trick)
+
+
+def _solve(hands, leader, trick, need, trump):
+    """Tricks each player still wins from this position, by player index"""
+    key = (hands, leader, trick, need, trump)
+    result = _memo.get(key)
+    if result is not None:
+        return result
+
+    num_players = len(hands)
+    player = (leader + len(trick)) % num_players
+    hand = hands[player]
+    best = None
+    best_miss = None
+    # Every card not in a hand or in the trick is out of play, so equivalent cards merge often
+    gone = FULL_DECK_MASK & ~hand_mask(trick)
+    for other in hands:
+        gone &= ~other
+    for card in hand_cards(class_representatives(legal_mask(hand, led_suit(trick)), hand, gone)):
+        rest = hands[:player] + (hand & ~CARD_BIT[card],) + hands[player + 1:]
+        played = trick + (card,)
+        if len(played) < num_players:
+            outcome = _solve(rest, leader, played, need, trump)
+        else:
+            winner = trick_winner(played, leader, trump)
+            if any(rest):
+                still = need[:winner] + (need[winner] - 1,) + need[winner + 1:]
+                outcome = _solve(rest, winner, (), still, trump)
+            else:
+                outcome = (0,) * num_players
+            outcome = outcome[:winner] + (outcome[winner] + 1,) + outcome[winner + 1:]
+
+        # An exact bid beats any miss, and a smaller miss a bigger one
+        miss = abs(need[player] - outcome[player])
+        if best is None or miss < best_miss:
+            best = outcome
+            best_miss = miss
+            if not miss:
+                break
+
+    if len(_memo) >= MEMO_LIMIT:
+        _memo.clear()
+    _memo[key] = best
+    return best
+
+
+def solve(game_state):
+    """Tricks each player ends the round with under max^n play, in player_names order
+
+    game_state must be a determinization in the playing phase.
+    """
+    names = game_state.player_names
+    leader = game_state.trick_leader_index
+    trick = tuple(game_state.played_cards[names[(leader + offset) % len(names)]]
+                  for offset in range(len(game_state.played_cards)))
+    won = [game_state.tricks_won[name] for name in names]
+    need = tuple(game_state.bids[name] - tricks for name, tricks in zip(names, won))
+    hands = tuple(game_state.players[name]["hand"] for name in names)
+    # Trick counts don't depend on suit names, so solve the canonical relabelling
+    perm = suit_permutation(hands + tuple(CARD_BIT[card] for card in trick), game_state.trump_suit)
+    rest = _solve(tuple(permute_mask(hand, perm) for hand in hands), leader,
+                  tuple(permute_card(card, perm) for card in trick), need, permute_suit(game_state.trump_suit, perm))
+    return [tricks + more for tricks, more in zip(won, rest)]
+
+
+def solved_scores(game_state):
+    """Total scores once the round is played out exactly, like get_final_scores() after a playout"""
+    scores = game_state.scores.copy()
+    if game_state.phase != GamePhase.PLAYING:
+        return scores
+    for name, won in zip(game_state.player_names, solve(game_state)):
+        bid = game_state.bids[name]
+        scores[name] += 20 + 10 * won if bid == won else -10 * abs(bid - won)
+    return scores
@@ -1,7 +1,8 @@
-import pygame
 import random
 from enum import Enum
 import datetime
+from cards import *
+from card_tracker import CardTracker
 
 
 
@@ -13,12 +14,8 @@ class GamePhase(Enum):
     GAME_OVER = 5
 
 def create_deck():
-    """Create a Wizard deck: 52 regular cards + 4 Wizards + 4 Fools"""
-    suits = ['R', 'G', 'B', 'Y']  # Red, Green, Blue, Yellow
-    ranks = list(range(1, 14))  # 1-13
-    deck = [f"{rank}{suit}" for rank in ranks for suit in suits]
-    deck += ["Wizard"] * 4
-    deck += ["Fool"] * 4
+    """Create a Wizard deck: 52 regular cards + 4 Wizards + 4 Fools (as card ids)"""
+    deck = list(range(DECK_SIZE))
     random.shuffle(deck)
     return deck
 
@@ -38,14 +35,15 @@ def create_players(num_players,name_input="Player 1"):
     else:  # 6 players
         positions = [(400, 600), (650, 500), (650, 250), (400, 100), (150, 250), (150, 500)]
     
-    players[name_input]= {"pos": positions[0],"hand": [],"is_human": True}
+    # "hand" is a bitmask of card ids (see cards.py)
+    players[name_input]= {"pos": positions[0],"hand": 0,"is_human": True}
 
     
          
     for i in range(1,num_players):
         players[f"Player {i+1}"] = {
             "pos": positions[i],
-            "hand": [],
+            "hand": 0,
             "is_human": i == 0  # Only Player 1 is human
         }
     
@@ -79,21 +77,81 @@ class WizardGame:
         self.played_cards = {}  # {player: card} for current trick
         self.trick_num = 1
         self.led_suit = None
+        self.move_history = []  # Bids and card plays made this round, as action dicts
+        self.tracker = CardTracker()  # Public card knowledge, reset at every deal
         
         # Scoring
         self.scores = {name: 0 for name in self.player_names}
         self.round_results = []
         
-        # UI state
+        # Undo entries recorded by apply()
+        self.undo_stack = []
+        
+        # Log state
         self.message = ""
-        self.bid_buttons = []
         self.game_log = []
-        self.log_scroll = 0
-        self.ai_timer = 0
-        self.next_round_timer = 1
+        self.log_file = "wizard_game_log.txt"  # None to skip saving the log at game over
         
         self.start_new_round()
 
+    def clone(self):
+        """Cheap copy for search: copies the mutable round state and shares history
+        
+        Hands are int bitmasks, so copying a player is a small dict copy. Round
+        history (round_results) is shared because it is only ever replaced, never
+        mutated. UI state (card rects) is dropped and the clone does not keep a
+        game log.
+        """
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        new.players = {name: {"pos": info["pos"], "hand": info["hand"], "is_human": info["is_human"]}
+                       for name, info in self.players.items()}
+        new.deck = self.deck[:]
+        new.bids = self.bids.copy()
+        new.tricks_won = self.tricks_won.copy()
+        new.played_cards = self.played_cards.copy()
+        new.move_history = self.move_history[:]
+        new.tracker = self.tracker.copy()
+        new.scores = self.scores.copy()
+        new.undo_stack = []
+        new.game_log = None
+        return new
+
+    def relabelled(self, perm):
+        """Clone with the suits relabelled by ``perm`` (``perm[old suit] = new suit``, see cards.suit_permutation)"""
+        new = self.clone()
+        for info in new.players.values():
+            info["hand"] = permute_mask(info["hand"], perm)
+        new.played_cards = {name: permute_card(card, perm) for name, card in self.played_cards.items()}
+        new.deck = [permute_card(card, perm) for card in self.deck]
+        new.move_history = [dict(action, card=permute_card(action['card'], perm)) if 'card' in action else action
+                            for action in self.move_history]
+        new.tracker = self.tracker.permuted(perm)
+        new.trump_suit = permute_suit(self.trump_suit, perm)
+        new.trump_card = None if self.trump_card is None else permute_card(self.trump_card, perm)
+        new.led_suit = permute_suit(self.led_suit, perm)
+        return new
+
+    def canonical(self, perspective=None):
+        """Clone with the suits relabelled into canonical form, and the permutation used
+        
+        Trump becomes suit 0 and the other suits are ordered by the hands, the
+        current trick, the cards played this round and the known suit voids
+        (see cards.suit_permutation), so positions that only differ by the
+        names of interchangeable suits give the same clone. With a
+        ``perspective`` player only their own hand counts, so every
+        determinization of their information set is relabelled the same way.
+        ``perm[old suit] = new suit``; a card chosen on the clone maps back
+        with permute_card(card, invert_permutation(perm)).
+        """
+        names = self.player_names if perspective is None else [perspective]
+        masks = [self.players[name]["hand"] for name in names]
+        masks += [CARD_BIT[self.played_cards[name]] if name in self.played_cards else 0 for name in self.player_names]
+        masks += [self.tracker.played, self.tracker.exposed]
+        masks += [self.tracker.void_mask(index) for index in range(len(self.tracker.voids))]
+        perm = suit_permutation(masks, self.trump_suit)
+        return self.relabelled(perm), perm
+
     def set_human_player_name(self, new_name):
         """Update the human player's name"""
         # Find the human player
@@ -156,7 +214,8 @@ class WizardGame:
     def start_new_round(self):
         """Start a new round"""
         if self.round_num > self.max_rounds:
-            self.save_game_log()
+            if self.log_file:
+                self.save_game_log(self.log_file)
             self.phase = GamePhase.GAME_OVER
             self.message = "Game Over!"
             return
@@ -169,21 +228,22 @@ class WizardGame:
         self.played_cards = {}
         self.trick_num = 1
         self.led_suit = None
+        self.move_history = []
         
         # Deal cards
         self.deal_cards()
         
         # Determine trump
         self.determine_trump()
+        self.tracker = CardTracker(self.num_players, self.round_num, self.trump_card)
         
         # Start bidding with player to left of dealer
         self.current_player_index = (self.dealer_index + 1) % self.num_players
         self.phase = GamePhase.BIDDING
-        self.bid_buttons = []
         
         self.log(f"Round {self.round_num} started. {self.player_names[self.dealer_index]} deals.")
-        if self.trump_suit:
-            self.log(f"Trump suit: {self.trump_suit} (from {self.trump_card})")
+        if self.trump_suit is not None:
+            self.log(f"Trump suit: {suit_name(self.trump_suit)} (from {card_name(self.trump_card)})")
         else:
             self.log("No trump this round")
     
@@ -193,14 +253,14 @@ class WizardGame:
         
         # Clear hands
         for player in self.players.values():
-            player["hand"] = []
+            player["hand"] = 0
         
         # Deal cards
         for _ in range(cards_per_player):
             for i in range(self.num_players):
                 player_name = self.player_names[i]
                 if self.deck:
-                    self.players[player_name]["hand"].append(self.deck.pop())
+                    self.players[player_name]["hand"] |= CARD_BIT[self.deck.pop()]
     
     def determine_trump(self):
         """Determine trump suit based on top card of remaining deck"""
@@ -217,17 +277,68 @@ class WizardGame:
             
         self.trump_card = self.deck.pop()
         
-        if self.trump_card == "Fool":
+        if is_fool(self.trump_card):
             self.trump_suit = None
-        elif self.trump_card == "Wizard":
+        elif is_wizard(self.trump_card):
             # Dealer chooses trump - for now, let's make it random for AI dealer
             if self.players[self.player_names[self.dealer_index]]["is_human"]:
                 # Human dealer - would need UI for this
-                self.trump_suit = random.choice(['R', 'G', 'B', 'Y'])
+                self.trump_suit = random.randrange(NUM_SUITS)
             else:
-                self.trump_suit = random.choice(['R', 'G', 'B', 'Y'])
+                self.trump_suit = random.randrange(NUM_SUITS)
+        else:
+            self.trump_suit = CARD_SUIT[self.trump_card]
+    
+    def apply(self, action):
+        """Apply a bid or card play action and record an undo entry for it
+        
+        Covers everything the move triggers (resolve_trick and score_round).
+        Returns False, without recording anything, if the action is illegal.
+        """
+        entry = (self.current_player_index, self.trick_leader_index, self.trick_num, self.led_suit,
+                 self.phase, self.played_cards, self.round_results, self.round_num, self.dealer_index)
+        if action['type'] == 'bid':
+            player = self.player_names[self.current_player_index]
+            if not self.process_bid(action['value']):
+                return False
+            self.undo_stack.append((player, None) + entry)
+        else:
+            player = action['player']
+            if not self.play_card(action['card'], player):
+                return False
+            self.undo_stack.append((player, action['card']) + entry)
+        return True
+    
+    def undo(self):
+        """Take back the last action made with apply()"""
+        (player, card, current_player_index, trick_leader_index, trick_num, led_suit,
+         phase, played_cards, round_results, round_num, dealer_index) = self.undo_stack.pop()
+        
+        if round_num != self.round_num:
+            # The move scored the round
+            for name, score in self.round_results[-1]['scores'].items():
+                self.scores[name] -= score
+        if trick_num != self.trick_num:
+            # The move completed a trick, whose winner now leads
+            self.tricks_won[self.player_names[self.trick_leader_index]] -= 1
+        
+        self.move_history.pop()
+        if card is None:
+            del self.bids[player]
         else:
-            self.trump_suit = self.trump_card[-1]  # Last character is suit
+            self.players[player]["hand"] |= CARD_BIT[card]
+            del played_cards[player]
+            self.tracker.unplay(card)
+        
+        self.current_player_index = current_player_index
+        self.trick_leader_index = trick_leader_index
+        self.trick_num = trick_num
+        self.led_suit = led_suit
+        self.phase = phase
+        self.played_cards = played_cards
+        self.round_results = round_results
+        self.round_num = round_num
+        self.dealer_index = dealer_index
     
     def process_bid(self, bid):
         """Process a bid from current player"""
@@ -236,6 +347,7 @@ class WizardGame:
             
         current_player = self.player_names[self.current_player_index]
         self.bids[current_player] = bid
+        self.move_history.append({'type': 'bid', 'value': bid, 'player': current_player})
         self.log(f"{current_player} bids {bid}")
         
         # Move to next player
@@ -253,22 +365,37 @@ class WizardGame:
     
     def can_play_card(self, card, player_name):
         """Check if a card can be legally played"""
-        if not self.led_suit:
+        if self.led_suit is None:
             return True  # First card of trick, anything goes
         
-        if card in ["Wizard", "Fool"]:
+        if card >= NUM_REGULAR:
             return True  # Special cards can always be played
         
-        player_hand = self.players[player_name]["hand"]
+        if CARD_SUIT[card] == self.led_suit:
+            return True
         
         # Must follow led suit if possible
-        can_follow_suit = any(c[-1] == self.led_suit and c not in ["Wizard", "Fool"] 
-                             for c in player_hand)
-        
-        if can_follow_suit:
-            return card[-1] == self.led_suit or card in ["Wizard", "Fool"]
-        else:
-            return True  # Can play anything if can't follow suit
+        return not self.players[player_name]["hand"] & SUIT_MASKS[self.led_suit]
+    
+    def get_legal_cards(self, player_name):
+        """List the cards in a player's hand that can be legally played"""
+        return hand_cards(legal_mask(self.players[player_name]["hand"], self.led_suit))
+    
+    def distinct_card_mask(self, player_name):
+        """Legal cards of a player with only one card kept per class of equivalent cards
+        
+        Cards played in earlier tricks of the round and the turned-up trump card
+        are out of play, so they join the ranks around them (see
+        cards.class_representatives). Cards in the current trick still matter.
+        """
+        hand = self.players[player_name]["hand"]
+        trick = hand_mask(self.played_cards.values())
+        gone = (self.tracker.played & ~trick) | self.tracker.exposed
+        return class_representatives(legal_mask(hand, self.led_suit), hand, gone)
+    
+    def get_distinct_cards(self, player_name):
+        """List one legal card per class of equivalent cards, see distinct_card_mask()"""
+        return hand_cards(self.distinct_card_mask(player_name))
     
     def play_card(self, card, player_name):
         """Play a card"""
@@ -278,26 +405,25 @@ class WizardGame:
         if player_name != self.player_names[self.current_player_index]:
             return False  # Not this player's turn
         
+        hand = self.players[player_name]["hand"]
+        if not hand & CARD_BIT[card]:
+            return False  # Card not in hand
+        
         if not self.can_play_card(card, player_name):
             self.log(f"{player_name} must follow led suit!")
             return False
         
         # Remove card from hand and play it
-        self.players[player_name]["hand"].remove(card)
+        self.players[player_name]["hand"] = hand & ~CARD_BIT[card]
         self.played_cards[player_name] = card
+        self.move_history.append({'type': 'play_card', 'card': card, 'player': player_name})
+        self.tracker.play(self.current_player_index, card, self.led_suit)
         
-        # Set led suit if this is first card
-        if not self.led_suit:
-            if card == "Fool":
-                # Fool doesn't set led suit - wait for next card
-                pass
-            elif card not in ["Wizard", "Fool"]:
-                self.led_suit = card[-1]
-        elif self.led_suit is None and card not in ["Wizard", "Fool"]:
-            # Second card after Fool sets the led suit
-            self.led_suit = card[-1]
+        # Set led suit from the first regular card (Wizards and Fools don't set it)
+        if self.led_suit is None and card < NUM_REGULAR:
+            self.led_suit = CARD_SUIT[card]
         
-        self.log(f"{player_name} played {card}")
+        self.log(f"{player_name} played {card_name(card)}")
         
         # Move to next player
         self.current_player_index = (self.current_player_index + 1) % self.num_players
@@ -332,34 +458,26 @@ class WizardGame:
         
         # Check for Wizards first
         for player, card in self.played_cards.items():
-            if card == "Wizard":
+            if is_wizard(card):
                 return player  # First Wizard wins
         
-        # No Wizards - check for trump cards
-        trump_cards = {}
-        for player, card in self.played_cards.items():
-            if card != "Fool" and self.trump_suit and card[-1] == self.trump_suit:
-                trump_cards[player] = int(card[:-1])
-        
-        if trump_cards:
-            # Highest trump wins
-            winner = max(trump_cards.items(), key=lambda x: x[1])
-            return winner[0]
-        
-        # No trump - check led suit
-        if self.led_suit:
-            led_suit_cards = {}
+        # No Wizards - highest trump wins, otherwise highest card of the led suit.
+        # Card ids within a suit are ordered by rank.
+        for suit in (self.trump_suit, self.led_suit):
+            if suit is None:
+                continue
+            winner = None
+            best = -1
             for player, card in self.played_cards.items():
-                if card != "Fool" and card[-1] == self.led_suit:
-                    led_suit_cards[player] = int(card[:-1])
-            
-            if led_suit_cards:
-                winner = max(led_suit_cards.items(), key=lambda x: x[1])
-                return winner[0]
+                if card < NUM_REGULAR and CARD_SUIT[card] == suit and card > best:
+                    winner = player
+                    best = card
+            if winner is not None:
+                return winner
         
         # Only Fools played - first Fool wins
         for player, card in self.played_cards.items():
-            if card == "Fool":
+            if is_fool(card):
                 return player
         
         # Shouldn't reach here
@@ -385,89 +503,34 @@ class WizardGame:
             self.scores[player] += score
             self.log(f"{player}: bid {bid}, won {won} -> {score} points")
         
-        self.round_results.append({
+        # Replace rather than append so clones can share the history list
+        self.round_results = self.round_results + [{
             'round': self.round_num,
             'bids': self.bids.copy(),
             'won': self.tricks_won.copy(),
             'scores': round_scores.copy()
-        })
+        }]
         
         # Advance to next round
         self.round_num += 1
         self.dealer_index = (self.dealer_index + 1) % self.num_players
-        
-        # Set timer for next round
-        self.next_round_timer = pygame.time.get_ticks() + 3000  # 3 seconds
-    
-    def update(self):
-        """Update game state - handle timers"""
-        current_time = pygame.time.get_ticks()
-        
-        # Handle next round timer
-        if self.next_round_timer > 0 and current_time >= self.next_round_timer:
-            self.next_round_timer = 0
-            self.start_new_round()
-        
-        # Handle AI moves
-        if self.phase == GamePhase.BIDDING:
-            current_player = self.player_names[self.current_player_index]
-            if not self.players[current_player]["is_human"]:
-                if self.ai_timer == 0:
-                    self.ai_timer = current_time + 1000  # 1.5 second delay
-                elif current_time >= self.ai_timer:
-                    self.ai_timer = 0
-                    # Simple AI bidding
-                    ai_bid = random.randint(0, self.round_num)
-                    self.process_bid(ai_bid)
-        
-        elif self.phase == GamePhase.PLAYING:
-            current_player = self.player_names[self.current_player_index]
-            if not self.players[current_player]["is_human"]:
-                if self.ai_timer == 0:
-                    self.ai_timer = current_time + 1000  # 1 second delay
-                elif current_time >= self.ai_timer:
-                    self.ai_timer = 0
-                    # Simple AI - play first legal card
-                    hand = self.players[current_player]["hand"]
-                    for card in hand:
-                        if self.can_play_card(card, current_player):
-                            self.play_card(card, current_player)
-                            break
     
-    def handle_click(self, pos):
-        """Handle mouse clicks"""
-        if self.phase == GamePhase.BIDDING:
-            return self.handle_bid_click(pos)
-        elif self.phase == GamePhase.PLAYING:
-            return self.handle_card_click(pos)
-        return False
+    def choose_ai_bid(self, player_name):
+        """Pick a bid for an AI-controlled player"""
+        # Simple AI bidding
+        return random.randint(0, self.round_num)
     
-    def handle_bid_click(self, pos):
-        """Handle clicking on bid buttons"""
-        for rect, bid_value in self.bid_buttons:
-            if rect.collidepoint(pos):
-                return self.process_bid(bid_value)
-        return False
-    
-    
-    def handle_card_click(self, pos):
-        """Handle clicking on cards"""
-        current_player = self.player_names[self.current_player_index]
-        player_info = self.players[current_player]
-        
-        # Only allow human player to click
-        if not player_info["is_human"]:
-            return False
-        
-        #for rect, card in player_info.get("rects", []):
-        for rect, card in reversed(player_info.get("rects", [])):
-            if rect.collidepoint(pos):
-                return self.play_card(card, current_player)
-        return False
+    def choose_ai_card(self, player_name):
+        """Pick a card for an AI-controlled player (None if it has no legal card)"""
+        # Simple AI - play first legal card
+        legal_cards = self.get_legal_cards(player_name)
+        return legal_cards[0] if legal_cards else None
 
 
     def log(self, message):
         """Add message to game log"""
+        if self.game_log is None:
+            return  # Search clones don't keep a log
         self.game_log.append(message)
         self.message = message
         if len(self.game_log) > 100:  # Limit log size
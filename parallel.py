@@ -0,0 +1,34 @@
+"""Shared process pools for parallel search.
+
+Starting worker processes costs far more than one AI decision, so pools are
+created on first use and kept for the life of the program, one per size.
+
+Workers are spawned rather than forked. The first pool is usually created
+on the UI's AI thread while SDL runs on the main thread, and forking a
+multi-threaded process can deadlock the child.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import util
+
+_pools = {}
+
+
+def get_pool(workers):
+    """Persistent process pool with ``workers`` processes"""
+    pool = _pools.get(workers)
+    if pool is None:
+        if not _pools:
+            # A pool created inside another pool's worker (e.g. a tournament game) must be
+            # shut down before that worker joins its children on exit, which atexit is too late for
+            util.Finalize(None, shutdown_pools, exitpriority=100)
+        pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+    return pool
+
+
+def shutdown_pools():
+    """Stop every pool's worker processes"""
+    for pool in _pools.values():
+        pool.shutdown(cancel_futures=True)
+    _pools.clear()
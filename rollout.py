@@ -0,0 +1,154 @@
+"""Batched random rollouts with NumPy.
+
+Plays K determinized worlds of the same round to the end at once: legal
+move masking, random card choice and trick resolution are all done as
+array operations across the batch. Card ids follow cards.py.
+"""
+import numpy as np
+
+from cards import DECK_SIZE, NUM_RANKS, NUM_REGULAR
+from game_state import GamePhase
+
+# Per-card lookup tables; Wizards get suit 4 and Fools suit 5
+_CARD_IDS = np.arange(DECK_SIZE)
+CARD_SUIT = np.where(_CARD_IDS < NUM_REGULAR, _CARD_IDS // NUM_RANKS, np.where(_CARD_IDS < 56, 4, 5))
+CARD_RANK = np.where(_CARD_IDS < NUM_REGULAR, _CARD_IDS % NUM_RANKS + 1, 0)
+WIZARD_SUIT = 4
+FOOL_SUIT = 5
+_BIT_SHIFTS = np.arange(DECK_SIZE, dtype=np.uint64)
+
+
+def unpack_hands(masks):
+    """(..., ) uint64 hand bitmasks -> (..., 60) bool arrays"""
+    masks = np.asarray(masks, dtype=np.uint64)
+    return ((masks[..., None] >> _BIT_SHIFTS) & np.uint64(1)).astype(bool)
+
+
+def round_scores(bids, tricks_won):
+    """Wizard scoring: 20 + 10 per trick for an exact bid, -10 per trick off otherwise"""
+    return np.where(bids == tricks_won, 20 + 10 * tricks_won, -10 * np.abs(bids - tricks_won))
+
+
+def batch_rollout(hands, bids, trump, leader, trick_cards, tricks_won, round_num, rng=None):
+    """Play K worlds to the end of the round with uniformly random legal moves
+
+    hands        (K, P) uint64 bitmasks, or (K, P, 60) bool
+    bids         (K, P) ints, -1 for players who haven't bid yet (random bid)
+    trump        suit index, -1 for no trump (scalar or (K,))
+    leader       (K,) index of the player who leads the current trick
+    trick_cards  (K, P) card ids played in the current trick, -1 if not yet
+    tricks_won   (K, P) tricks won so far this round
+
+    All worlds must be at the same point of the round. Returns the (K, P)
+    round scores.
+    """
+    rng = rng or np.random.default_rng()
+    bids = np.array(bids)
+    missing = bids < 0
+    if missing.any():
+        bids[missing] = rng.integers(0, round_num + 1, size=missing.sum())
+    return round_scores(bids, play_tricks(hands, trump, leader, trick_cards, tricks_won, rng))
+
+
+def play_tricks(hands, trump, leader, trick_cards, tricks_won, rng=None):
+    """Play the rest of the round in K worlds with random legal moves; returns the (K, P) tricks won
+
+    Arguments as for batch_rollout.
+    """
+    rng = rng or np.random.default_rng()
+    hands = np.array(hands)
+    if hands.dtype != bool:
+        hands = unpack_hands(hands)
+    num_worlds, num_players = hands.shape[:2]
+    worlds = np.arange(num_worlds)
+
+    trump = np.broadcast_to(np.asarray(trump), (num_worlds,))
+    leader = np.array(leader)
+    trick_cards = np.array(trick_cards)
+    tricks_won = np.array(tricks_won)
+
+    regular = CARD_SUIT < WIZARD_SUIT
+    special = ~regular
+
+    while hands.any() or (trick_cards >= 0).any():
+        led = np.full(num_worlds, -1)
+        position = np.zeros((num_worlds, num_players), dtype=int)
+        for step in range(num_players):
+            player = (leader + step) % num_players
+            position[worlds, player] = step
+            card = trick_cards[worlds, player]
+            need = card < 0
+            if need.any():
+                # Must follow the led suit if possible; Wizards and Fools are always legal
+                hand = hands[worlds, player]
+                follow = hand & (CARD_SUIT[None, :] == led[:, None]) & regular[None, :]
+                must_follow = follow.any(axis=1)
+                legal = np.where(must_follow[:, None], follow | (hand & special[None, :]), hand)
+                keys = np.where(legal, rng.random(legal.shape), -1.0)
+                choice = keys.argmax(axis=1)
+                card = np.where(need, choice, card)
+                trick_cards[worlds, player] = card
+                played = worlds[need]
+                hands[played, player[need], card[need]] = False
+            # The first regular card sets the led suit
+            sets_led = (led < 0) & (card < NUM_REGULAR)
+            led = np.where(sets_led, CARD_SUIT[card], led)
+
+        # First Wizard, else highest trump, else highest of the led suit, else first Fool
+        suits = CARD_SUIT[trick_cards]
+        ranks = CARD_RANK[trick_cards]
+        strength = np.where(suits == WIZARD_SUIT, 300 - position,
+                   np.where(suits == trump[:, None], 200 + ranks,
+                   np.where(suits == led[:, None], 100 + ranks,
+                   np.where(suits == FOOL_SUIT, 10 - position, 0))))
+        winner = strength.argmax(axis=1)
+        tricks_won[worlds, winner] += 1
+        leader = winner
+        trick_cards[:] = -1
+
+    return tricks_won
+
+
+def rollout_state(game_state, count, rng=None):
+    """Run ``count`` batched rollouts from one WizardGame state; returns (count, P) round scores"""
+    names = game_state.player_names
+    index = {name: i for i, name in enumerate(names)}
+    hands = np.array([game_state.players[name]["hand"] for name in names], dtype=np.uint64)
+    bids = np.array([game_state.bids.get(name, -1) for name in names])
+    trick_cards = np.full(len(names), -1)
+    for name, card in game_state.played_cards.items():
+        trick_cards[index[name]] = card
+    tricks_won = np.array([game_state.tricks_won.get(name, 0) for name in names])
+    trump = -1 if game_state.trump_suit is None else game_state.trump_suit
+    leader = game_state.trick_leader_index
+    if game_state.phase == GamePhase.BIDDING:
+        leader = (game_state.dealer_index + 1) % len(names)  # Left of the dealer leads the first trick
+
+    return batch_rollout(np.broadcast_to(unpack_hands(hands), (count, len(names), DECK_SIZE)),
+                         np.broadcast_to(bids, (count, len(names))),
+                         trump,
+                         np.full(count, leader),
+                         np.broadcast_to(trick_cards, (count, len(names))),
+                         np.broadcast_to(tricks_won, (count, len(names))),
+                         game_state.round_num, rng)
+
+
+def rollout_win_rate(game_state, player_name, count, rng=None):
+    """Fraction of ``count`` batched rollouts where ``player_name`` finishes at or above the average score"""
+    names = game_state.player_names
+    totals = rollout_state(game_state, count, rng) + np.array([game_state.scores[name] for name in names])
+    player = names.index(player_name)
+    return float((totals[:, player] >= totals.mean(axis=1)).mean())
+
+
+def rollout_rewards(game_state, count, rng=None):
+    """Each player's mean reward over ``count`` batched rollouts, in player_names order
+
+    A rollout's reward is the final score relative to the average, normalized
+    to [-1, 1] like ai.player_rewards.
+    """
+    names = game_state.player_names
+    totals = rollout_state(game_state, count, rng) + np.array([game_state.scores[name] for name in names])
+    centred = totals - totals.mean(axis=1, keepdims=True)
+    max_diff = np.abs(centred).max(axis=1, keepdims=True)
+    return (centred / np.where(max_diff > 0, max_diff, 1)).mean(axis=0)
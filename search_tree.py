@@ -0,0 +1,256 @@
+"""Array-backed ISMCTS tree.
+
+Nodes live in parallel NumPy arrays instead of Python objects, so one node
+costs a few tens of bytes. A node's children are allocated together as one
+contiguous block, which makes UCB selection a vectorised argmax over a
+slice. The arrays grow in chunks as the tree fills up.
+
+Action codes are small ints: a card id for a card play, BID_CODE + value
+for a bid.
+
+For single-observer ISMCTS a node's block holds every action that could be
+legal there in some determinization. Each iteration marks which of them are
+legal in its sampled world, and UCB uses the per-child availability count
+in place of the parent's visit count.
+
+Nodes can also record the Zobrist key of the information set they lead to.
+A bounded transposition table maps keys to expanded nodes, and a node that
+reaches an information set already in the table shares that node's child
+block, so move orders that transpose pool their statistics.
+
+Each node also keeps All-Moves-As-First (RAVE) statistics: after an
+iteration, every sibling whose card the same player played soon after in
+that iteration counts the result as if it had been played first. Until a
+child has visits of its own, selection leans on that estimate.
+"""
+from collections import defaultdict
+
+import numpy as np
+
+from cards import permute_card
+
+BID_CODE = 64
+
+ROOT = 0
+UNEXPANDED = -1
+
+
+def action_code(action):
+    """Small-int code for a get_legal_actions() action dict"""
+    if action['type'] == 'bid':
+        return BID_CODE + action['value']
+    return action['card']
+
+
+def code_action(code, player):
+    """Action dict for an action code played by ``player``"""
+    if code >= BID_CODE:
+        return {'type': 'bid', 'value': code - BID_CODE, 'player': player}
+    return {'type': 'play_card', 'card': code, 'player': player}
+
+
+def permute_code(code, perm):
+    """Action code with its card's suit relabelled by ``perm``; bids are unchanged"""
+    if code >= BID_CODE:
+        return code
+    return permute_card(code, perm)
+
+
+class SearchTree:
+    def __init__(self, chunk_size=4096, table_limit=1 << 18):
+        self.chunk_size = chunk_size
+        self.table_limit = table_limit
+        self.table = {}  # Information-set key -> expanded node
+        self.capacity = 0
+        self.size = 0
+        self.visits = np.zeros(0, dtype=np.int32)
+        self.value = np.zeros(0, dtype=np.float64)   # Sum of rewards for the player who acted
+        self.avail = np.zeros(0, dtype=np.int32)     # Iterations in which the action was legal
+        self.parent = np.zeros(0, dtype=np.int32)
+        self.first_child = np.zeros(0, dtype=np.int32)
+        self.num_children = np.zeros(0, dtype=np.int16)
+        self.action = np.zeros(0, dtype=np.int16)    # Action code that led to the node
+        self.player = np.zeros(0, dtype=np.int8)     # Index of the player who made that action
+        self.key = np.zeros(0, dtype=np.uint64)      # Information-set key after the action (0 if unknown)
+        self.amaf_visits = np.zeros(0, dtype=np.int32)   # Iterations where the player played this card later
+        self.amaf_value = np.zeros(0, dtype=np.float64)  # Sum of that player's rewards in them
+        self.allocate(1, parent=-1)                  # Root
+
+    def _grow(self, needed):
+        """Grow every array by whole chunks so at least ``needed`` nodes fit"""
+        capacity = self.capacity
+        while capacity < needed:
+            capacity += self.chunk_size
+        for name in ('visits', 'value', 'avail', 'parent', 'first_child', 'num_children', 'action', 'player', 'key',
+                     'amaf_visits', 'amaf_value'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+        self.capacity = capacity
+
+    def allocate(self, count, parent, codes=0, player=-1):
+        """Append ``count`` sibling nodes under ``parent`` and return the first index"""
+        start = self.size
+        if start + count > self.capacity:
+            self._grow(start + count)
+        end = start + count
+        self.parent[start:end] = parent
+        self.first_child[start:end] = UNEXPANDED
+        self.action[start:end] = codes
+        self.player[start:end] = player
+        self.key[start:end] = 0
+        self.size = end
+        return start
+
+    def expand(self, node, codes, player):
+        """Give ``node`` one child per action code (an empty block marks it terminal)"""
+        self.first_child[node] = self.allocate(len(codes), node, codes, player)
+        self.num_children[node] = len(codes)
+
+    def transpose(self, node, key):
+        """Share the child block of the node already expanded for ``key``; False if there is none"""
+        other = self.table.get(key)
+        if other is None:
+            return False
+        self.first_child[node] = self.first_child[other]
+        self.num_children[node] = self.num_children[other]
+        return True
+
+    def remember(self, node, key):
+        """Add an expanded node to the transposition table, while there is room"""
+        if len(self.table) < self.table_limit:
+            self.table.setdefault(key, node)
+
+    def is_expanded(self, node):
+        return self.first_child[node] != UNEXPANDED
+
+    def legal_children(self, node, legal_cards=None):
+        """Boolean mask over the child block: which card codes are in the ``legal_cards`` bitmask
+
+        ``None`` means every child is legal (bids).
+        """
+        codes = self.action[self.first_child[node]:self.first_child[node] + self.num_children[node]]
+        if legal_cards is None:
+            return np.ones(len(codes), dtype=bool)
+        return ((np.uint64(legal_cards) >> codes.astype(np.uint64)) & np.uint64(1)).astype(bool)
+
+    def select(self, node, legal, c_param=1.4, rave_k=0):
+        """Availability-based UCB over the children that are ``legal`` in this determinization
+
+        With ``rave_k`` > 0 a child's mean is blended with its AMAF mean,
+        weighted by beta = sqrt(k / (3n + k)) for n visits: all AMAF at first,
+        half at n = k, fading out after. Children with AMAF statistics then
+        no longer have to be tried before the others.
+        """
+        start = int(self.first_child[node])
+        end = start + int(self.num_children[node])
+        self.avail[start:end][legal] += 1
+        visits = self.visits[start:end]
+        untried = legal & (visits == 0)
+        if rave_k:
+            amaf_visits = self.amaf_visits[start:end]
+            untried &= amaf_visits == 0
+        if untried.any():
+            return start + int(untried.argmax())
+        mean = self.value[start:end] / np.maximum(visits, 1)
+        if rave_k:
+            beta = np.where(amaf_visits > 0, np.sqrt(rave_k / (3 * visits + rave_k)), 0.0)
+            mean = (1 - beta) * mean + beta * self.amaf_value[start:end] / np.maximum(amaf_visits, 1)
+        visits = np.maximum(visits, 1)  # Illegal children may be unvisited; they are masked out below
+        avail = np.maximum(self.avail[start:end], 1)
+        ucb = mean + c_param * np.sqrt(2 * np.log(avail) / visits)
+        return start + int(np.where(legal, ucb, -np.inf).argmax())
+
+    def child_stats(self, node):
+        """Copies of the action codes, visits and values of ``node``'s children"""
+        start = int(self.first_child[node])
+        end = start + int(self.num_children[node]) if start >= 0 else start
+        return self.action[start:end].copy(), self.visits[start:end].copy(), self.value[start:end].copy()
+
+    def find_child(self, node, code):
+        """Child of ``node`` reached by action ``code``, or None"""
+        start = int(self.first_child[node])
+        if start < 0:
+            return None
+        match = np.flatnonzero(self.action[start:start + int(self.num_children[node])] == code)
+        return start + int(match[0]) if len(match) else None
+
+    def subtree(self, node):
+        """Copy of ``node``'s subtree as a new tree with ``node`` as its root
+
+        Child blocks shared through the transposition table stay shared in the copy.
+        """
+        tree = SearchTree(self.chunk_size, self.table_limit)
+        for name in ('visits', 'value', 'avail', 'action', 'player', 'key', 'amaf_visits', 'amaf_value'):
+            getattr(tree, name)[ROOT] = getattr(self, name)[node]
+        copied = {}  # Old block start -> new block start
+        stack = [(node, ROOT)] if self.is_expanded(node) else []
+        while stack:
+            old, new = stack.pop()
+            start = int(self.first_child[old])
+            count = int(self.num_children[old])
+            tree.num_children[new] = count
+            if start in copied:
+                tree.first_child[new] = copied[start]
+                continue
+            end = start + count
+            first = tree.allocate(count, new, self.action[start:end], self.player[start:end])
+            copied[start] = tree.first_child[new] = first
+            for name in ('visits', 'value', 'avail', 'key', 'amaf_visits', 'amaf_value'):
+                getattr(tree, name)[first:first + count] = getattr(self, name)[start:end]
+            # Only expanded children have blocks of their own to copy
+            for offset in np.flatnonzero(self.first_child[start:end] != UNEXPANDED):
+                stack.append((start + int(offset), first + int(offset)))
+        for new in np.flatnonzero(tree.first_child[:tree.size] != UNEXPANDED):
+            if tree.key[new]:
+                tree.remember(int(new), int(tree.key[new]))
+        return tree
+
+    def add_virtual_loss(self, path, loss=1.0):
+        """Count an in-flight rollout as a lost visit so other workers steer away from its path"""
+        self.visits[path] += 1
+        self.value[path] -= loss
+
+    def remove_virtual_loss(self, path, loss=1.0):
+        """Take back add_virtual_loss once the rollout's result is in"""
+        self.visits[path] -= 1
+        self.value[path] += loss
+
+    def backpropagate(self, path, reward):
+        """Add one rollout's reward to every node on the selection path
+
+        ``reward`` is either one number or an array with a reward per player,
+        in which case each node gets the reward of the player who acted.
+        """
+        self.visits[path] += 1
+        if np.ndim(reward):
+            reward = reward[self.player[path]]
+        self.value[path] += reward
+
+    def update_amaf(self, path, moves, reward, window=2):
+        """Add one iteration's per-player ``reward`` to the AMAF statistics along ``path``
+
+        ``moves`` lists the iteration's moves from the root as (player index,
+        action code): moves[i] is the one made at path[i], and the rest are
+        the rollout's. At each node, the children for the next ``window``
+        cards played by the player choosing there (that node's own move
+        included) are updated. Every card in a hand is played by the end of
+        the round, so counting all later cards would give every sibling the
+        same estimate.
+        """
+        plays = defaultdict(list)  # Player -> their card plays, latest first
+        for i in range(len(moves) - 1, -1, -1):
+            player, code = moves[i]
+            if code >= BID_CODE:
+                continue
+            plays[player].append(code)
+            if i >= len(path) - 1:
+                continue
+            later = 0
+            for card in plays[player][-window:]:
+                later |= 1 << card
+            start = int(self.first_child[path[i]])
+            played = start + np.flatnonzero(self.legal_children(path[i], later))
+            self.amaf_visits[played] += 1
+            self.amaf_value[played] += reward[player]
@@ -0,0 +1,35 @@
+import random
+
+import pytest
+
+from cards import (CARD_BIT, CARD_SUIT, DECK_SIZE, FOOLS, NUM_RANKS, NUM_REGULAR, WIZARDS, class_representatives,
+                   hand_cards, hand_mask, legal_mask)
+
+
+def naive_representatives(legal, hand, gone):
+    """Lowest legal Wizard and Fool, and every legal card whose next lower card still in play is not our own"""
+    result = 0
+    for card in hand_cards(legal):
+        if card >= NUM_REGULAR:
+            group = WIZARDS if card in WIZARDS else FOOLS
+            if not any(other < card and legal & CARD_BIT[other] for other in group):
+                result |= CARD_BIT[card]
+            continue
+        lower = card - 1
+        while lower >= CARD_SUIT[card] * NUM_RANKS and gone & CARD_BIT[lower]:
+            lower -= 1
+        if lower < CARD_SUIT[card] * NUM_RANKS or not hand & CARD_BIT[lower]:
+            result |= CARD_BIT[card]
+    return result
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_class_representatives_matches_naive_scan(seed):
+    rng = random.Random(seed)
+    for _ in range(1000):
+        deck = rng.sample(range(DECK_SIZE), DECK_SIZE)
+        size = rng.randint(1, 20)
+        hand = hand_mask(deck[:size])
+        gone = hand_mask(deck[size:size + rng.randint(0, 35)])
+        legal = legal_mask(hand, rng.choice([None, 0, 1, 2, 3]))
+        assert class_representatives(legal, hand, gone) == naive_representatives(legal, hand, gone)
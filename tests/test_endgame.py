@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+import endgame
+from cards import NUM_SUITS
+from game_state import GamePhase, WizardGame
+
+
+def random_endgame(seed):
+    """A round of 1-3 cards in play after random bids and a few random cards, or None if it's already over"""
+    random.seed(seed)
+    game = WizardGame(random.choice([3, 4, 5]))
+    game.log_file = None
+    game.round_num = random.randint(1, 3)
+    game.start_new_round()
+    game = game.clone()
+    while game.phase == GamePhase.BIDDING:
+        game.process_bid(random.randint(0, game.round_num))
+    for _ in range(random.randint(0, game.num_players)):
+        player = game.player_names[game.current_player_index]
+        game.play_card(random.choice(game.get_legal_cards(player)), player)
+    return game if game.phase == GamePhase.PLAYING else None
+
+
+def brute_force(game):
+    """Tricks each player ends with under max^n play over every legal card, lowest card first on ties"""
+    if game.phase != GamePhase.PLAYING:
+        return [game.tricks_won[name] for name in game.player_names]
+    index = game.current_player_index
+    player = game.player_names[index]
+    best = None
+    for card in game.get_legal_cards(player):
+        game.apply({'type': 'play_card', 'card': card, 'player': player})
+        outcome = brute_force(game)
+        game.undo()
+        miss = abs(game.bids[player] - outcome[index])
+        if best is None or miss < best_miss:
+            best, best_miss = outcome, miss
+            if not miss:
+                break
+    return best
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_solve_matches_brute_force(seed):
+    game = random_endgame(seed)
+    if game is None:
+        return
+    endgame._memo.clear()
+    # The solver breaks ties on the canonical relabelling, so compare on that
+    assert endgame.solve(game) == brute_force(game.canonical()[0])
+    assert endgame.solve(game) == brute_force(game.canonical()[0])  # Again, from the memo
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_solved_scores_ignore_suit_names(seed):
+    game = random_endgame(seed)
+    if game is None:
+        return
+    relabelled = game.relabelled(tuple(random.sample(range(NUM_SUITS), NUM_SUITS)))
+    endgame._memo.clear()
+    scores = endgame.solved_scores(game)
+    endgame._memo.clear()
+    assert endgame.solved_scores(relabelled) == scores
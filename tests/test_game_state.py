@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from game_state import GamePhase, WizardGame
+
+
+def random_game(seed):
+    """A clone of a random deal, some moves into its round"""
+    random.seed(seed)
+    game = WizardGame(random.randint(3, 6))
+    game.round_num = random.randint(1, game.max_rounds)
+    game.start_new_round()
+    game = game.clone()
+    game.log_file = None
+    for _ in range(random.randint(0, 10)):
+        action = random_action(game)
+        if action is None:
+            break
+        game.apply(action)
+    game.undo_stack = []
+    return game
+
+
+def random_action(game):
+    """A random legal action for the player to move, None once the round is over"""
+    player = game.player_names[game.current_player_index]
+    if game.phase == GamePhase.BIDDING:
+        return {'type': 'bid', 'value': random.randint(0, game.round_num), 'player': player}
+    if game.phase == GamePhase.PLAYING:
+        return {'type': 'play_card', 'card': random.choice(game.get_legal_cards(player)), 'player': player}
+    return None
+
+
+def snapshot(game):
+    return (dict(game.bids), dict(game.tricks_won), dict(game.played_cards), dict(game.scores),
+            len(game.round_results), {name: info["hand"] for name, info in game.players.items()},
+            game.current_player_index, game.trick_leader_index, game.trick_num, game.led_suit,
+            game.phase, game.round_num, game.dealer_index, list(game.move_history),
+            game.tracker.played, game.tracker.exposed, tuple(game.tracker.voids), tuple(game.tracker.hand_sizes))
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_undo_restores_state(seed):
+    game = random_game(seed)
+    before = snapshot(game)
+    while (action := random_action(game)) is not None:
+        assert game.apply(action)
+    while game.undo_stack:
+        game.undo()
+    assert snapshot(game) == before
@@ -0,0 +1,51 @@
+import numpy as np
+
+from search_tree import ROOT, SearchTree
+
+
+def amaf_tree():
+    """Root with player 0's cards 1-4; the child for card 2 has player 1's cards 10-12, its child for 11 is a leaf"""
+    tree = SearchTree()
+    tree.expand(ROOT, [1, 2, 3, 4], 0)
+    middle = tree.find_child(ROOT, 2)
+    tree.expand(middle, [10, 11, 12], 1)
+    return tree, [ROOT, middle, tree.find_child(middle, 11)]
+
+
+def test_update_amaf_counts_the_next_plays_within_the_window():
+    tree, path = amaf_tree()
+    # Path moves, then the rollout: player 0 plays 4, 3, 1 later and player 1 plays 10, 12
+    moves = [(0, 2), (1, 11), (0, 4), (1, 10), (0, 3), (1, 12), (0, 1)]
+    tree.update_amaf(path, moves, np.array([0.5, -0.5]), window=2)
+
+    start = int(tree.first_child[ROOT])
+    assert tree.amaf_visits[start:start + 4].tolist() == [0, 1, 0, 1]  # Cards 2 and 4
+    assert tree.amaf_value[start:start + 4].tolist() == [0.0, 0.5, 0.0, 0.5]
+
+    start = int(tree.first_child[path[1]])
+    assert tree.amaf_visits[start:start + 3].tolist() == [1, 1, 0]  # Cards 10 and 11
+    assert tree.amaf_value[start:start + 3].tolist() == [-0.5, -0.5, 0.0]
+    assert not tree.amaf_visits[start + 3:tree.size].any()
+
+
+def test_select_without_rave_is_plain_ucb():
+    tree = SearchTree()
+    tree.expand(ROOT, [1, 2, 3, 4], 0)
+    children = slice(1, 5)
+    tree.visits[children] = [10, 3, 0, 6]
+    tree.value[children] = [6.0, 2.5, 0.0, -1.0]
+    tree.avail[children] = [20, 20, 20, 20]
+    tree.amaf_visits[children] = [50, 50, 40, 50]
+    tree.amaf_value[children] = [-50.0, -50.0, 40.0, 50.0]
+    legal = np.array([True, True, False, True])
+
+    visits = tree.visits[children][legal]
+    mean = tree.value[children][legal] / visits
+    ucb = mean + 1.4 * np.sqrt(2 * np.log(21) / visits)
+    expected = 1 + int(np.flatnonzero(legal)[ucb.argmax()])
+    assert tree.select(ROOT, legal, rave_k=0) == expected
+    assert tree.select(ROOT, legal, rave_k=250) != expected  # The AMAF values do change the pick with RAVE on
+
+    # An unvisited legal child is tried first, whatever its AMAF statistics say
+    legal[2] = True
+    assert tree.select(ROOT, legal, rave_k=0) == 3
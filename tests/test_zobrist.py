@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from cards import NUM_SUITS, invert_permutation, permute_card
+from game_state import GamePhase
+from test_game_state import random_action, random_game
+from zobrist import advance_key, info_set_key
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_advance_key_matches_info_set_key(seed):
+    game = random_game(seed)
+    perspective = random.randrange(game.num_players)
+    name = game.player_names[perspective]
+    key = info_set_key(game, name)
+    while (action := random_action(game)) is not None:
+        assert game.apply(action)
+        if game.phase not in (GamePhase.BIDDING, GamePhase.PLAYING):
+            break  # Keys only cover a round in progress
+        key = advance_key(key, game, perspective)
+        assert key == info_set_key(game, name)
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_canonical_key_ignores_suit_names(seed):
+    game = random_game(seed)
+    if game.phase not in (GamePhase.BIDDING, GamePhase.PLAYING):
+        return
+    name = game.player_names[game.current_player_index]
+    relabelled = game.relabelled(tuple(random.sample(range(NUM_SUITS), NUM_SUITS)))
+    state, perm = game.canonical(name)
+    other, _ = relabelled.canonical(name)
+    assert info_set_key(state, name) == info_set_key(other, name)
+
+    if state.phase == GamePhase.PLAYING:
+        inverse = invert_permutation(perm)
+        legal = game.get_legal_cards(name)
+        for card in state.get_legal_cards(name):
+            assert permute_card(card, inverse) in legal
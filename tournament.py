@@ -0,0 +1,196 @@
+"""Headless self-play tournament between ISMCTS AI configurations.
+
+Plays complete games with no window and no UI delays, spread across a
+process pool, and reports throughput, decision latency, average scores
+and win rates.
+
+Example:
+    python tournament.py --games 40 --players 4 --workers 8 \
+        --config fast:iterations=1000,time_limit=0.1 \
+        --config slow:iterations=5000,time_limit=0.5 \
+        --config heuristic:heuristic=1
+"""
+import argparse
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ai import ISMCTSWizardGame, ISMCTSAIPlayer
+from bid_table import load_bid_table
+from game_state import GamePhase
+
+
+def parse_config(spec):
+    """Parse "name:key=value,..." into (name, settings) for an AI seat"""
+    name, separator, options = spec.partition(":")
+    if not separator:
+        options = spec  # Unnamed config, e.g. "iterations=1000"
+    settings = {}
+    for option in filter(None, options.split(",")):
+        key, _, value = option.partition("=")
+        if key in ("iterations", "workers", "rave_k", "rave_window"):
+            settings[key] = int(value)
+        elif key in ("time_limit", "bid_refine"):
+            settings[key] = float(value)
+        elif key == "heuristic":
+            settings[key] = value not in ("0", "false", "no")
+        elif key == "bid_table":
+            settings[key] = None if value in ("0", "false", "no") else value  # Table file, or off
+        else:
+            settings[key] = value
+    return name, settings
+
+
+def make_ai(player_name, settings):
+    """Build an ISMCTSAIPlayer from a config's settings"""
+    ai_player = ISMCTSAIPlayer(player_name, iterations=settings.get("iterations", 1000))
+    for key, value in settings.items():
+        if key == "bid_table":
+            ai_player.bid_table = load_bid_table(value) if value else None
+        elif key not in ("iterations", "heuristic"):
+            setattr(ai_player, key, value)
+    return ai_player
+
+
+def play_game(game_index, num_players, seats, configs, max_rounds=None, seed=None):
+    """Play one complete game; seats[i] is the config index of player i"""
+    if seed is not None:
+        random.seed(seed)
+
+    game = ISMCTSWizardGame(num_players)
+    game.log_file = None
+    if max_rounds:
+        game.max_rounds = min(max_rounds, game.max_rounds)
+    for info in game.players.values():
+        info["is_human"] = False
+    ai_players = {name: make_ai(name, configs[seats[i]][1]) for i, name in enumerate(game.player_names)}
+
+    latencies = []  # (config index, seconds)
+    while game.phase != GamePhase.GAME_OVER:
+        if game.phase == GamePhase.SCORING:
+            game.start_new_round()
+            continue
+
+        config_index = seats[game.current_player_index]
+        player = game.player_names[game.current_player_index]
+        ai_player = ai_players[player]
+        settings = configs[config_index][1]
+        start = time.perf_counter()
+        if game.phase == GamePhase.BIDDING:
+            if settings.get("heuristic"):
+                bid = ai_player.simple_bid_heuristic(game)
+            else:
+                bid = ai_player.get_bid(game)
+            game.process_bid(bid)
+        else:
+            legal_cards = game.get_legal_cards(player)
+            if settings.get("heuristic"):
+                card = ai_player.simple_card_heuristic(game, legal_cards)
+            else:
+                card = ai_player.get_card_play(game)
+            if card is None or not game.play_card(card, player):
+                game.play_card(legal_cards[0], player)
+        latencies.append((config_index, time.perf_counter() - start))
+
+    scores = [game.scores[name] for name in game.player_names]
+    return {"game": game_index, "seats": seats, "scores": scores, "latencies": latencies}
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return float("nan")
+    index = min(len(values) - 1, max(0, math.ceil(fraction * len(values)) - 1))
+    return values[index]
+
+
+def mean_ci(values, z=1.96):
+    """Mean and half-width of its normal-approximation confidence interval"""
+    n = len(values)
+    if n == 0:
+        return float("nan"), float("nan")
+    mean = sum(values) / n
+    if n < 2:
+        return mean, float("inf")
+    variance = sum((v - mean) ** 2 for v in values) / (n - 1)
+    return mean, z * math.sqrt(variance / n)
+
+
+def wilson_interval(wins, n, z=1.96):
+    """Wilson score interval for a win rate"""
+    if n == 0:
+        return float("nan"), float("nan")
+    p = wins / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return centre - half_width, centre + half_width
+
+
+def report(configs, results, elapsed):
+    """Print the tournament summary"""
+    games = len(results)
+    print(f"\n{games} games in {elapsed:.1f}s ({games / elapsed:.2f} games/sec)")
+
+    all_latencies = sorted(seconds for result in results for _, seconds in result["latencies"])
+    print(f"Decisions: {len(all_latencies)}  latency p50 {percentile(all_latencies, 0.5) * 1000:.1f} ms  "
+          f"p90 {percentile(all_latencies, 0.9) * 1000:.1f} ms  p99 {percentile(all_latencies, 0.99) * 1000:.1f} ms")
+
+    print(f"\n{'Config':<16}{'Seats':>6}{'Avg score':>18}{'Win rate':>24}{'p50 ms':>9}{'p99 ms':>9}")
+    for index, (name, _) in enumerate(configs):
+        seat_scores = []
+        wins = 0.0
+        for result in results:
+            best = max(result["scores"])
+            winners = result["scores"].count(best)
+            for seat, config_index in enumerate(result["seats"]):
+                if config_index != index:
+                    continue
+                seat_scores.append(result["scores"][seat])
+                if result["scores"][seat] == best:
+                    wins += 1 / winners  # Ties share the win
+        latencies = sorted(seconds for result in results
+                           for config_index, seconds in result["latencies"] if config_index == index)
+        mean, half_width = mean_ci(seat_scores)
+        low, high = wilson_interval(wins, len(seat_scores))
+        win_rate = wins / len(seat_scores) if seat_scores else float("nan")
+        print(f"{name:<16}{len(seat_scores):>6}{mean:>10.1f} ± {half_width:<5.1f}"
+              f"{win_rate:>10.1%} [{low:.1%}, {high:.1%}]"
+              f"{percentile(latencies, 0.5) * 1000:>9.1f}{percentile(latencies, 0.99) * 1000:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless ISMCTS self-play tournament")
+    parser.add_argument("--games", type=int, default=10, help="number of complete games to play")
+    parser.add_argument("--players", type=int, default=4, choices=range(3, 7), help="players per game")
+    parser.add_argument("--config", action="append", default=[], metavar="NAME:KEY=VALUE,...",
+                        help="AI config (iterations, time_limit, workers, heuristic, bid_table, bid_refine, "
+                             "rave_k, rave_window); repeat to add more")
+    parser.add_argument("--rounds", type=int, default=None, help="cap the number of rounds per game")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=None, help="base random seed")
+    args = parser.parse_args()
+
+    configs = [parse_config(spec) for spec in args.config] or [("default", {"time_limit": 0.2})]
+
+    # Rotate configs around the table so no config keeps the same seat
+    jobs = []
+    for game_index in range(args.games):
+        seats = [(seat + game_index) % len(configs) for seat in range(args.players)]
+        seed = None if args.seed is None else args.seed + game_index
+        jobs.append((game_index, args.players, seats, configs, args.rounds, seed))
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(play_game, *job) for job in jobs]
+        for future in futures:
+            result = future.result()
+            results.append(result)
+            print(f"Game {result['game'] + 1}/{args.games}: {result['scores']}")
+    report(configs, results, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
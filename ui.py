@@ -1,5 +1,8 @@
 import pygame
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from game_state import GamePhase
+from cards import card_name, suit_name, hand_cards, is_fool, CARD_SUIT
 import math
 
 # Colors
@@ -31,6 +34,142 @@ show_help = False
 best_move_suggestion = ""
 
 
+class GameTable:
+    """Thin pygame adapter around a WizardGame
+    
+    Owns the UI-side state (timers, bid buttons, log scroll) and the clock, so
+    the rules core in game_state.py never needs pygame. Every other attribute
+    is read from the wrapped game.
+    
+    AI decisions run on a background thread against a clone of the game, so
+    the frame loop keeps drawing and handling input while the AI thinks. On
+    the human's turn the same thread lets the AI players ponder.
+    """
+    def __init__(self, game, clock=None):
+        self.game = game
+        self.clock = clock or pygame.time.get_ticks  # Milliseconds
+        self.bid_buttons = []
+        self.log_scroll = 0
+        self.ai_timer = 0
+        self.next_round_timer = 1  # Re-deal on the first frame, after the setup screen renamed the human
+        self.ai_executor = ThreadPoolExecutor(max_workers=1)
+        self.ai_future = None
+        self.ai_position = None  # Position the pending AI decision was asked for
+        self.ponder_stop = None  # Set to end the running ponder
+        self.ponder_position = None
+        self.ponder_future = None
+        self.ponder_batch = 100  # Iterations per AI player before checking for the human's move
+
+    def __getattr__(self, name):
+        return getattr(self.game, name)
+
+    def update(self):
+        """Update game state - handle timers"""
+        game = self.game
+        current_time = self.clock()
+
+        # Schedule the next round once the current one has been scored
+        if game.phase == GamePhase.SCORING and self.next_round_timer == 0:
+            self.next_round_timer = current_time + 3000  # 3 seconds
+
+        # Handle next round timer
+        if self.next_round_timer > 0 and current_time >= self.next_round_timer:
+            self.next_round_timer = 0
+            game.start_new_round()
+
+        # Handle AI moves
+        if game.phase not in (GamePhase.BIDDING, GamePhase.PLAYING):
+            self.stop_pondering()
+            return
+        current_player = game.player_names[game.current_player_index]
+        position = (game.round_num, game.phase, len(game.move_history))
+        if self.ai_future is not None and self.ai_position != position:
+            # The game moved on (e.g. a new round) before the decision came back
+            self.ai_future = None
+            self.ai_timer = 0
+        if game.players[current_player]["is_human"]:
+            if self.ponder_position != position:
+                # Ponder the position the human is now facing
+                self.stop_pondering()
+                self.ponder_stop = threading.Event()
+                self.ponder_position = position
+                self.ponder_future = self.ai_executor.submit(self.ponder, game.clone(), self.ponder_stop)
+                self.ponder_future.add_done_callback(self.report_ponder_error)
+            return
+        self.stop_pondering()
+        if self.ai_future is None:
+            snapshot = game.clone()
+            if game.phase == GamePhase.BIDDING:
+                self.ai_future = self.ai_executor.submit(snapshot.choose_ai_bid, current_player)
+            else:
+                self.ai_future = self.ai_executor.submit(snapshot.choose_ai_card, current_player)
+            self.ai_position = position
+            # At least half a second for bids, longer for card play
+            self.ai_timer = current_time + (500 if game.phase == GamePhase.BIDDING else 1000)
+        elif self.ai_future.done() and current_time >= self.ai_timer:
+            move = self.ai_future.result()
+            self.ai_future = None
+            self.ai_timer = 0
+            if game.phase == GamePhase.BIDDING:
+                game.process_bid(move)
+            elif move is not None:
+                game.play_card(move, current_player)
+
+    def ponder(self, snapshot, stop):
+        """Let the AI players search ahead in turn until ``stop`` is set (runs on the AI thread)"""
+        ai_players = [ai_player for name, ai_player in getattr(snapshot, "ai_players", {}).items()
+                      if not snapshot.players[name]["is_human"]]
+        busy = True
+        while busy and not stop.is_set():
+            busy = False
+            for ai_player in ai_players:
+                if stop.is_set():
+                    break
+                busy = ai_player.ponder(snapshot, self.ponder_batch) or busy
+
+    def report_ponder_error(self, future):
+        """Print the exception a finished ponder raised, which nothing else would collect"""
+        if not future.cancelled() and future.exception() is not None:
+            print(f'Ponder failed: {future.exception()!r}')
+
+    def stop_pondering(self):
+        """End the running ponder, if any, so the AI thread is free for the next decision"""
+        if self.ponder_stop is not None:
+            self.ponder_stop.set()
+            self.ponder_stop = None
+            self.ponder_position = None
+            self.ponder_future = None
+
+    def handle_click(self, pos):
+        """Handle mouse clicks"""
+        if self.game.phase == GamePhase.BIDDING:
+            return self.handle_bid_click(pos)
+        elif self.game.phase == GamePhase.PLAYING:
+            return self.handle_card_click(pos)
+        return False
+
+    def handle_bid_click(self, pos):
+        """Handle clicking on bid buttons"""
+        for rect, bid_value in self.bid_buttons:
+            if rect.collidepoint(pos):
+                return self.game.process_bid(bid_value)
+        return False
+
+    def handle_card_click(self, pos):
+        """Handle clicking on cards"""
+        game = self.game
+        current_player = game.player_names[game.current_player_index]
+        player_info = game.players[current_player]
+
+        # Only allow human player to click
+        if not player_info["is_human"]:
+            return False
+
+        for rect, card in reversed(player_info.get("rects", [])):
+            if rect.collidepoint(pos):
+                return game.play_card(card, current_player)
+        return False
+
 
 def draw_board(screen, game):
     """Draw the game board"""
@@ -302,7 +441,7 @@ def draw_poker_table(screen):
 def draw_player_cards(screen, game, name, info, small_font):
     """Draw cards for a player"""
     x, y = info["pos"]
-    hand = info["hand"]
+    hand = hand_cards(info["hand"])
     info["rects"] = []
     
     # Determine if we should show cards
@@ -397,7 +536,7 @@ def draw_player_cards(screen, game, name, info, small_font):
 
 def draw_trump_card(screen, game, font, small_font):
     """Draw the trump card"""
-    if not game.trump_card:
+    if game.trump_card is None:
         return
         
     trump_x, trump_y = 600, 50
@@ -443,12 +582,14 @@ def draw_card(screen, game, card, card_x, card_y,card_width=40,card_height=60):
     pygame.draw.rect(screen, (0, 0, 0, 80), shadow_rect, border_radius=6)
 
     # Determine card background color
+    suit = CARD_SUIT[card]
+    card = card_name(card)
     card_color = WHITE
     if card == "Wizard":
         card_color = LIGHT_BLUE
     elif card == "Fool":
         card_color = LIGHT_RED
-    elif game.trump_suit and len(card) > 1 and card[-1] == game.trump_suit:
+    elif game.trump_suit is not None and suit == game.trump_suit:
         card_color = LIGHT_YELLOW
 
     pygame.draw.rect(screen, card_color, card_rect, border_radius=6)
@@ -463,9 +604,8 @@ def draw_card(screen, game, card, card_x, card_y,card_width=40,card_height=60):
         text_color = RED
     elif len(card) > 1:
         display_text = card[:-1]  # number/letter
-        suit = card[-1]
         suit_colors = {'R': RED, 'G': GREEN, 'B': BLUE, 'Y': (255, 215, 88)}
-        text_color = suit_colors.get(suit, BLACK)
+        text_color = suit_colors.get(suit_name(suit), BLACK)
 
     # Draw card text (both upright and inverted)
     card_font = pygame.font.SysFont("Arial", 16, bold=True)
@@ -581,10 +721,10 @@ def draw_game_info(screen, game,small_font):
     screen.blit(phase_text, (info_x, info_y + 50))
     
     # Trump suit info
-    if game.trump_suit:
-        trump_text = font.render(f"Trump: {game.trump_suit}", True, WHITE)
+    if game.trump_suit is not None:
+        trump_text = font.render(f"Trump: {suit_name(game.trump_suit)}", True, WHITE)
         screen.blit(trump_text, (info_x, info_y + 75))
-    elif game.trump_card == "Fool":
+    elif game.trump_card is not None and is_fool(game.trump_card):
         no_trump_text = font.render("No Trump (Fool)", True, WHITE)
         screen.blit(no_trump_text, (info_x, info_y + 75))
     
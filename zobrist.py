@@ -0,0 +1,101 @@
+"""Zobrist hashing of a player's information set within a round.
+
+The key covers what one player can know: their own hand, the cards played
+in finished tricks, the current trick (who played what), bids, tricks won,
+trump, phase and whose turn it is. Other players' hands are not part of it,
+so every determinization of a position hashes the same, and move orders
+that reach the same information set collide on purpose.
+
+advance_key() updates a key after one WizardGame.apply() using the undo
+entry the move left behind, so search never rehashes a whole state.
+
+Search runs on the canonical relabelling of its root (see
+WizardGame.canonical), so positions that differ only by the names of the
+non-trump suits share one key. The relabelling is fixed for the whole
+search, which keeps advance_key a plain update.
+"""
+import random
+
+from cards import CARD_BIT, DECK_SIZE, NUM_SUITS
+from game_state import GamePhase
+
+MAX_PLAYERS = 6
+MAX_TRICKS = DECK_SIZE // 3 + 1  # Bids and trick counts run 0..20
+
+_rng = random.Random(0x5EED)  # Fixed seed: keys must match across processes
+
+
+def _keys(*shape):
+    if len(shape) == 1:
+        return tuple(_rng.getrandbits(64) for _ in range(shape[0]))
+    return tuple(_keys(*shape[1:]) for _ in range(shape[0]))
+
+
+OWN_KEYS = _keys(DECK_SIZE)                     # Card in the perspective player's hand
+SEEN_KEYS = _keys(DECK_SIZE)                    # Card played in a finished trick
+TRICK_KEYS = _keys(MAX_PLAYERS, DECK_SIZE)      # Card played by a player into the current trick
+BID_KEYS = _keys(MAX_PLAYERS, MAX_TRICKS)
+TRICKS_KEYS = _keys(MAX_PLAYERS, MAX_TRICKS)    # Tricks won so far by a player
+TURN_KEYS = _keys(MAX_PLAYERS)
+TRUMP_KEYS = _keys(NUM_SUITS + 1)               # Last entry: no trump
+PLAYING_KEY = _rng.getrandbits(64)
+
+
+def info_set_key(game_state, perspective):
+    """Full Zobrist key of ``perspective``'s information set in game_state"""
+    index = {name: i for i, name in enumerate(game_state.player_names)}
+    key = TURN_KEYS[game_state.current_player_index]
+    key ^= TRUMP_KEYS[NUM_SUITS if game_state.trump_suit is None else game_state.trump_suit]
+    if game_state.phase != GamePhase.BIDDING:
+        key ^= PLAYING_KEY
+
+    hand = game_state.players[perspective]["hand"]
+    while hand:
+        low = hand & -hand
+        key ^= OWN_KEYS[low.bit_length() - 1]
+        hand ^= low
+
+    for name, bid in game_state.bids.items():
+        key ^= BID_KEYS[index[name]][bid]
+    for name, tricks in game_state.tricks_won.items():
+        key ^= TRICKS_KEYS[index[name]][tricks]
+
+    seen = game_state.tracker.played
+    for name, card in game_state.played_cards.items():
+        key ^= TRICK_KEYS[index[name]][card]
+        seen &= ~CARD_BIT[card]
+    while seen:
+        low = seen & -seen
+        key ^= SEEN_KEYS[low.bit_length() - 1]
+        seen ^= low
+    return key
+
+
+def advance_key(key, game_state, perspective_index):
+    """Key after the move game_state.apply() just made, from the move's undo entry"""
+    (player, card, current_player_index, trick_leader_index, trick_num, led_suit,
+     phase, played_cards, round_results, round_num, dealer_index) = game_state.undo_stack[-1]
+    key ^= TURN_KEYS[current_player_index] ^ TURN_KEYS[game_state.current_player_index]
+    names = game_state.player_names
+
+    if card is None:
+        key ^= BID_KEYS[names.index(player)][game_state.bids[player]]
+        if game_state.phase != phase:
+            key ^= PLAYING_KEY  # Bidding is over
+        return key
+
+    player_index = names.index(player)
+    if player_index == perspective_index:
+        key ^= OWN_KEYS[card]
+    if trick_num == game_state.trick_num:
+        return key ^ TRICK_KEYS[player_index][card]
+
+    # The card finished the trick: it and the rest of the trick are now just seen cards
+    key ^= SEEN_KEYS[card]
+    for name, trick_card in played_cards.items():
+        if name != player:
+            key ^= TRICK_KEYS[names.index(name)][trick_card] ^ SEEN_KEYS[trick_card]
+    winner = game_state.trick_leader_index
+    tricks = game_state.tricks_won[names[winner]]
+    return key ^ TRICKS_KEYS[winner][tricks - 1] ^ TRICKS_KEYS[winner][tricks]
+